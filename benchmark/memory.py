@@ -0,0 +1,56 @@
+import sys 
+import os
+import gc
+import random
+import types
+sys.path.append(os.path.abspath("../src"))
+
+from fun_fun_plot.primitives import *
+from fun_fun_plot.operators import *
+from fun_fun_plot.interfaces.raster import *
+
+
+
+ScatterPlot = Plot(
+    Axis(
+        Data(
+            Circle(
+                Xnormal(Attr(0)),
+                Ynormal(Attr(1)),
+                4,
+                background_color = ClassColor(Attr(2))
+            )
+        )
+    ),
+    ffp_raster, width = 400, height = 400
+)
+
+
+
+def dataset(rows):
+	return [[random.uniform(4, 8), random.uniform(1, 7), random.choice(["setosa", "versicolor", "virginica"])] for _ in range(rows)]
+
+def size(obj, shared):
+	"""This function returns the bytes of the objects only reachable from obj."""
+	seen = set(map(id, shared))
+	stack, total = [obj], 0
+	while stack:
+		obj = stack.pop()
+		if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType, types.ClassType)):
+			continue
+		seen.add(id(obj))
+		total += sys.getsizeof(obj)
+		stack.extend(gc.get_referents(obj))
+	return total
+
+
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+data = dataset(rows)
+plot = ScatterPlot.compile().copy()
+scene = ffp_eval(plot.component, plot, data, rows, (0,0,0,0))
+shared = [data, plot] + [value for row in data for value in row] + plot.palette
+columns = scene.component.operator
+objects = list(columns)
+print("columns %8.1f bytes/shape" % (float(size(columns, shared)) / rows))
+print("objects %8.1f bytes/shape" % (float(size(objects, shared)) / rows))
@@ -0,0 +1,43 @@
+import sys 
+import os
+import multiprocessing
+import random
+import time
+sys.path.append(os.path.abspath("../src"))
+
+from fun_fun_plot.primitives import *
+from fun_fun_plot.operators import *
+from fun_fun_plot.batch import *
+from fun_fun_plot.interfaces.raster import *
+
+
+
+ScatterPlot = Plot(
+    Axis(
+        Data(
+            Circle(
+                Xnormal(Attr(0)),
+                Ynormal(Attr(1)),
+                4,
+                background_color = ClassColor(Attr(2))
+            )
+        )
+    ),
+    ffp_raster, width = 400, height = 400
+)
+
+
+
+def dataset(rows):
+	return [[random.uniform(4, 8), random.uniform(1, 7), random.choice(["setosa", "versicolor", "virginica"])] for _ in range(rows)]
+
+
+
+draws = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+datasets = [dataset(1000) for _ in range(draws)]
+for workers in range(1, multiprocessing.cpu_count() + 1):
+	start = time.time()
+	for png in ffp_render_many(ScatterPlot, datasets, ffp_raster, workers):
+		pass
+	elapsed = time.time() - start
+	print("%2d workers %8.2f ms/draw" % (workers, 1000 * elapsed / draws))
@@ -0,0 +1,49 @@
+import sys 
+import os
+import random
+import time
+sys.path.append(os.path.abspath("../src"))
+
+from fun_fun_plot.primitives import *
+from fun_fun_plot.operators import *
+from fun_fun_plot.interfaces.raster import *
+from fun_fun_plot.interfaces.null import *
+
+
+
+ScatterPlot = Plot(
+    Axis(
+        Data(
+            Circle(
+                Xnormal(Attr(0)),
+                Ynormal(Attr(1)),
+                4,
+                background_color = ClassColor(Attr(2))
+            )
+        )
+    ),
+    ffp_raster, width = 400, height = 400
+)
+
+
+
+def dataset(rows):
+	return [[random.uniform(4, 8), random.uniform(1, 7), random.choice(["setosa", "versicolor", "virginica"])] for _ in range(rows)]
+
+def benchmark(name, draw, datasets):
+	start = time.time()
+	for data in datasets:
+		draw(data)
+	elapsed = time.time() - start
+	print("%-20s %8.2f ms/draw" % (name, 1000 * elapsed / len(datasets)))
+	return elapsed
+
+
+
+draws = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+datasets = [dataset(150) for _ in range(draws)]
+for interface, primitives in [("raster", ffp_raster), ("null", ffp_null)]:
+	plot = Plot(ScatterPlot.component, primitives, ScatterPlot.width, ScatterPlot.height)
+	elapsed = benchmark("Plot.draw (%s)" % interface, plot.draw, datasets)
+	elapsed /= benchmark("Session.draw (%s)" % interface, plot.session().draw, datasets)
+	print("%-20s %8.2fx" % ("speedup", elapsed))
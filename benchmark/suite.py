@@ -0,0 +1,259 @@
+import sys
+import os
+import argparse
+import gc
+import json
+import multiprocessing
+import random
+import resource
+import time
+sys.path.append(os.path.abspath("../src"))
+
+from fun_fun_plot.primitives import *
+from fun_fun_plot.operators import *
+from fun_fun_plot.profiling import *
+from fun_fun_plot.interfaces.null import *
+from math import pi, radians, log, tan, sin, cos
+
+
+
+ScatterPlot = Plot(
+    Axis(
+        Data(
+            Circle(
+                Xnormal(Attr(0)),
+                Ynormal(Attr(1)),
+                4,
+                background_color = ClassColor(Attr(2))
+            )
+        )
+    ),
+    ffp_null, width = 400, height = 400
+)
+
+
+
+BarPlot = Plot(
+    Axis(
+        Data(
+            Rectangle(
+                Index * (Width / DataLen),
+                0,
+                Width / DataLen,
+                Ynormal(Attr(0)),
+                background_color = ClassColor(Attr(2))
+            ) +
+            Text(
+                (0.5 + Index) * (Width / DataLen),
+                Ynormal(Attr(0)) - 10,
+                Attr(0),
+                font_size = 10
+            )
+        ),
+        xticks = Range(DataLen, Width/DataLen/2, Width/DataLen),
+        xlabels = Column(1)
+    ),
+    ffp_null, width = 400, height = 400
+)
+
+
+
+PiePlot = Plot(
+    Data(
+        Empty(
+            Get("angle", 0) + Get("alpha", 0) >> "angle"
+        ) +
+        Pie(
+            Width/2,
+            Height/2,
+            Width/3 >> "radius",
+            Get("angle"),
+            Attr(0) * 360 / Call(sum)(Column(0)) >> "alpha",
+            background_color = ClassColor(Attr(1))
+        ) +
+        Text(
+            Width/2 + Call(cos)((Get("angle") + Get("alpha")/2)*pi/180) * Get("radius")/2,
+            Height/2 + Call(sin)((Get("angle") + Get("alpha")/2)*pi/180) * Get("radius")/2,
+            Call(str)(Get("alpha") / 3.6) + " %",
+            font_size = 12
+        )
+    ),
+    ffp_null, width = 400, height = 400
+)
+
+
+
+RadialBarPlot = Plot(
+    Rectangle(0, 0, Width, Height, background_color = "white", border_width = 0) +
+    Data(
+        Pie(
+            Width / 2,
+            Height / 2,
+            Width / 2 / (DataLen + 2) * (DataLen - Index + 1) >> "height",
+            90,
+            -270,
+            background_color = "white"
+        ) +
+        Pie(
+            Width / 2,
+            Height / 2,
+            Get("height"),
+            90,
+            Normal(Attr(0), Column(0)) * (-180) - 90,
+            background_color = ClassColor(Attr(2))
+        ) +
+        Text(
+            Width / 2,
+            Height / 2 + Get("height") - 10,
+            Attr(1) + " ",
+            text_align = "right",
+            font_size = 12
+        )
+    ) +
+    Circle(
+        Width / 2,
+        Height / 2,
+        Width / 2 / (DataLen + 2),
+        background_color = "white",
+        border_width = 0
+    ) +
+    Arc(
+        Width / 2,
+        Height / 2,
+        Width / 2 / (DataLen + 2),
+        90,
+        -270
+    ),
+    ffp_null, width = 400, height = 400
+)
+
+
+
+MapPlot = Plot(
+	Image(0, 0, "../res/web-mercator.png") +
+	Data(
+		Circle(
+			Width/(2*pi) * (Call(radians)(Attr(1)) + pi) >> "x",
+			Height/(2*pi) * (pi + Call(log)(Call(tan)(pi/4 + Call(radians)(Attr(0))/2))) >> "y",
+			3,
+			background_color = "red"
+		) +
+		Text(
+			Get("x"),
+			Get("y") - 10,
+			Attr(2),
+			font_size = 10
+		)
+	),
+    ffp_null, width = 830, height = 830
+)
+
+
+
+def word():
+	return "".join(random.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6))
+
+# This dictionary stores the plots of the samples and a generator of
+# synthetic rows for each of them.
+plots = {
+	"scatter": (ScatterPlot, lambda: [random.uniform(4, 8), random.uniform(1, 7), random.choice(["setosa", "versicolor", "virginica"])]),
+	"bar": (BarPlot, lambda: [random.uniform(0, 100), word(), "class"]),
+	"pie": (PiePlot, lambda: [random.uniform(1, 100), word()]),
+	"radial-bar": (RadialBarPlot, lambda: [random.uniform(1, 100), word(), "class"]),
+	"map": (MapPlot, lambda: [random.uniform(-80, 80), random.uniform(-180, 180), word()])
+}
+
+def backend(name):
+	"""This function returns the primitives of an interface."""
+	if name == "null":
+		return ffp_null
+	elif name == "raster":
+		from fun_fun_plot.interfaces.raster import ffp_raster
+		return ffp_raster
+	elif name == "svg":
+		from fun_fun_plot.interfaces.svg import ffp_svg
+		return ffp_svg()
+	raise ValueError("unknown backend %s" % name)
+
+def dataset(name, rows, columns):
+	random.seed(rows)
+	data = [plots[name][1]() for _ in range(rows)]
+	return Columns(list(zip(*data))) if columns else data
+
+def measure(case, queue):
+	"""This function draws a case in a new process and puts its results
+	in the queue: the times of the phases, the increase of the peak
+	memory and the objects retained by the drawn plot."""
+	name, interface, rows, columns = case
+	try:
+		plot = plots[name][0]
+		plot = Plot(plot.component, backend(interface), plot.width, plot.height)
+		data = dataset(name, rows, columns)
+		gc.collect()
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		objects = len(gc.get_objects())
+		plot.profile = Profile()
+		start = time.time()
+		plot = plot.draw(data)
+		total = time.time() - start
+		phases = dict((n, s) for (k, n), (c, s) in plot.profile.stats.items() if k == "phase")
+		gc.collect()
+		queue.put({
+			"plot": name, "backend": interface, "rows": rows, "columns": columns,
+			"eval": sum(phases.get(x, 0.0) for x in ["compile", "bounds", "compute", "eval"]),
+			"draw": sum(phases.get(x, 0.0) for x in ["canvas", "draw", "after"]),
+			"total": total,
+			"memory": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak) / 1024.0,
+			"objects": len(gc.get_objects()) - objects
+		})
+	except Exception as e:
+		queue.put({"plot": name, "backend": interface, "rows": rows, "columns": columns, "error": repr(e)})
+
+def run(case):
+	queue = multiprocessing.Queue()
+	process = multiprocessing.Process(target = measure, args = (case, queue))
+	process.start()
+	result = queue.get()
+	process.join()
+	return result
+
+def key(result):
+	return (result["plot"], result["backend"], result["rows"], result["columns"])
+
+
+
+parser = argparse.ArgumentParser(description = "Draws the sample plots over synthetic datasets.")
+parser.add_argument("--plots", nargs = "+", default = sorted(plots), choices = sorted(plots))
+parser.add_argument("--backends", nargs = "+", default = ["null"], choices = ["null", "raster", "svg"])
+parser.add_argument("--rows", nargs = "+", type = int, default = [1000, 10000, 100000])
+parser.add_argument("--columns", action = "store_true", help = "evaluate the datasets by columns")
+parser.add_argument("--save", help = "store the results in a JSON file")
+parser.add_argument("--compare", help = "compare the times with the results of a JSON file")
+args = parser.parse_args()
+
+baseline = dict([])
+if args.compare:
+	with open(args.compare) as f:
+		baseline = dict((key(x), x) for x in json.load(f))
+
+results = []
+print("%-10s %-7s %8s %10s %10s %10s %10s %10s" % ("plot", "backend", "rows", "eval ms", "draw ms", "total ms", "memory MiB", "objects"))
+for name in args.plots:
+	for interface in args.backends:
+		for rows in args.rows:
+			result = run((name, interface, rows, args.columns))
+			results.append(result)
+			if "error" in result:
+				print("%-10s %-7s %8d %s" % (name, interface, rows, result["error"]))
+				continue
+			line = "%-10s %-7s %8d %10.1f %10.1f %10.1f %10.1f %10d" % (name, interface, rows,
+				1000 * result["eval"], 1000 * result["draw"], 1000 * result["total"],
+				result["memory"], result["objects"])
+			previous = baseline.get(key(result))
+			if previous is not None and "error" not in previous:
+				line += " %+7.1f%%" % (100 * (result["total"] / previous["total"] - 1))
+			print(line)
+
+if args.save:
+	with open(args.save, "w") as f:
+		json.dump(results, f, indent = 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides the rendering of many datasets in parallel."""
+
+import multiprocessing
+import pickle
+
+from primitives import Plot
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+# This variable stores the session of each worker process.
+ffp_worker_session = None
+
+
+
+def __batch_init(template):
+	"""This function unpickles the plot in a worker process and opens
+	the session used for all its datasets."""
+	global ffp_worker_session
+	ffp_worker_session = pickle.loads(template).session()
+
+def __batch_draw(data):
+	"""This function draws a dataset in a worker process and returns
+	the encoded plot."""
+	plot = ffp_worker_session.draw(data)
+	return plot.primitives["encode"](plot)
+
+def ffp_render_many(plot, datasets, primitives, workers = None, chunksize = 1):
+	"""This function draws each dataset with the plot in a pool of worker
+	processes, yielding the encoded plots in the order of the datasets.
+
+	The primitives must be a headless interface providing the encode
+	primitive, as the ones returned by ffp_raster or ffp_svg(). The plot
+	is pickled once for all the workers, so the functions called by its
+	operators must be defined at module level."""
+	if "encode" not in primitives:
+		raise ValueError("the interface does not provide the encode primitive")
+	template = Plot(plot.component, primitives, plot.width, plot.height, dict(plot.data), plot.domain)
+	template.palette = plot.palette
+	template = pickle.dumps(template, pickle.HIGHEST_PROTOCOL)
+	pool = multiprocessing.Pool(workers, __batch_init, (template,))
+	try:
+		for encoded in pool.imap(__batch_draw, datasets, chunksize):
+			yield encoded
+		pool.close()
+	finally:
+		pool.terminate()
+		pool.join()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides a cache on disk of the encoded plots, keyed by the
+structure of the plot and the contents of the dataset."""
+
+import hashlib
+import marshal
+import numbers
+import os
+import pickle
+import tempfile
+import types
+import weakref
+from functools import partial
+
+from datasets import Columns, Stream
+from primitives import Element, Image, Operator
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+class RenderCache:
+	"""This class stores the encoded plots in a directory, dropping the least
+	recently used ones when their sizes exceed the budget in bytes. A plot
+	drawn again with the same dataset is read from the directory, without
+	evaluating it.
+
+	The plots are identified by the structure of their components and
+	operators, their size, palette, domain and data, and the encoding of
+	their interface. The functions called by the operators are identified
+	by their code, so the plots whose functions read global variables
+	should not be cached."""
+	
+	def __init__(self, directory, budget = 256 * 1024 * 1024):
+		self.directory = directory
+		self.budget = budget
+		self.fingerprints = weakref.WeakKeyDictionary()
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+	
+	def draw(self, plot, data):
+		"""This method returns the plot drawn with the dataset and encoded by
+		the encode primitive of its interface, from the cache if possible."""
+		if "encode" not in plot.primitives:
+			raise ValueError("the interface does not provide the encode primitive")
+		if not plot.compiled:
+			plot.compile()
+		key = self.key(plot, data)
+		if key is not None:
+			path = os.path.join(self.directory, key)
+			try:
+				with open(path, "rb") as f:
+					encoded = f.read()
+				os.utime(path, None)
+				return encoded
+			except (IOError, OSError):
+				pass
+		encoded = plot.primitives["encode"](plot.draw(data))
+		if key is not None:
+			self.store(key, encoded)
+		return encoded
+	
+	def key(self, plot, data):
+		"""This method returns the name of the file storing the plot drawn
+		with the dataset, or None if they cannot be identified."""
+		if isinstance(data, Stream):
+			return None
+		digest = hashlib.sha1()
+		try:
+			# The fingerprint of the component is computed once, but the
+			# images it reads are checked again in every draw
+			if plot.component not in self.fingerprints:
+				self.fingerprints[plot.component] = (ffp_hash(ffp_fingerprint(plot.component)),
+					ffp_image_paths(plot.component))
+			fingerprint, paths = self.fingerprints[plot.component]
+			digest.update(fingerprint)
+			for path in paths:
+				digest.update("%r;" % (os.path.getmtime(path) if os.path.exists(path) else None))
+			digest.update(ffp_hash(ffp_fingerprint([plot.width, plot.height, plot.palette,
+				plot.domain, plot.data, plot.primitives["encode"]])))
+			ffp_digest(data, digest)
+		except TypeError:
+			return None
+		return digest.hexdigest()
+	
+	def store(self, key, encoded):
+		"""This method writes an encoded plot and drops the least recently
+		used ones above the budget."""
+		handle, temporary = tempfile.mkstemp(prefix = ".", dir = self.directory)
+		with os.fdopen(handle, "wb") as f:
+			f.write(encoded)
+		os.rename(temporary, os.path.join(self.directory, key))
+		files = []
+		for name in os.listdir(self.directory):
+			if not name.startswith("."):
+				path = os.path.join(self.directory, name)
+				stat = os.stat(path)
+				files.append((stat.st_mtime, stat.st_size, path))
+		size = sum(map(lambda x: x[1], files))
+		for mtime, length, path in sorted(files)[:-1]:
+			if size <= self.budget:
+				break
+			os.remove(path)
+			size -= length
+	
+	def clear(self):
+		"""This method drops all the encoded plots."""
+		for name in os.listdir(self.directory):
+			if not name.startswith("."):
+				os.remove(os.path.join(self.directory, name))
+
+
+
+def ffp_fingerprint(obj, parts = None):
+	"""This function returns the strings describing the structure of a
+	graphical component or of any object inside it. It raises TypeError for the objects that
+	cannot be described by their contents."""
+	parts = [] if parts is None else parts
+	if obj is None or isinstance(obj, (numbers.Number, str, bytes, type(u""))):
+		parts.append("%s:%r;" % (type(obj).__name__, obj))
+	elif isinstance(obj, Element):
+		parts.append(obj.__class__.__name__ + "(")
+		for x in obj.get_attributes():
+			ffp_fingerprint(x, parts)
+		parts.append(")")
+	elif isinstance(obj, Operator):
+		parts.append("Operator(%r;%r;" % (obj.template, sorted(obj.flags)))
+		if obj.template is None:
+			ffp_fingerprint(obj.operation, parts)
+		for x in obj.operands:
+			ffp_fingerprint(x, parts)
+		parts.append(")")
+	elif isinstance(obj, (list, tuple)):
+		parts.append("[")
+		for x in obj:
+			ffp_fingerprint(x, parts)
+		parts.append("]")
+	elif isinstance(obj, dict):
+		ffp_fingerprint(sorted(obj.items()), parts)
+	elif isinstance(obj, partial):
+		ffp_fingerprint([obj.func, obj.args, sorted((obj.keywords or dict([])).items())], parts)
+	elif hasattr(obj, "co_code"):
+		parts.append(obj.co_code)
+		ffp_fingerprint([obj.co_names, obj.co_consts], parts)
+	elif hasattr(obj, "__code__"):
+		parts.append("%s.%s(" % (obj.__module__, obj.__name__))
+		cells = [] if obj.__closure__ is None else obj.__closure__
+		ffp_fingerprint([obj.__code__, obj.__defaults__, [x.cell_contents for x in cells]], parts)
+		parts.append(")")
+	elif callable(obj) and hasattr(obj, "__name__") and isinstance(getattr(obj, "__self__", None), (type(None), types.ModuleType)):
+		parts.append("%s.%s;" % (getattr(obj, "__module__", None), obj.__name__))
+	else:
+		raise TypeError("cannot fingerprint %r" % (obj,))
+	return parts
+
+def ffp_image_paths(obj, paths = None):
+	"""This function returns the paths of the image files drawn by a
+	graphical component."""
+	paths = [] if paths is None else paths
+	if isinstance(obj, Image) and isinstance(obj.path, str):
+		paths.append(obj.path)
+	if isinstance(obj, Element):
+		for x in obj.get_attributes():
+			ffp_image_paths(x, paths)
+	return paths
+
+def ffp_hash(parts):
+	"""This function returns the hash of the strings of a fingerprint."""
+	digest = hashlib.sha1()
+	for part in parts:
+		digest.update(part if isinstance(part, bytes) else part.encode("utf-8"))
+	return digest.digest()
+
+def ffp_digest(data, digest):
+	"""This function updates a hash with the contents of a dataset: the
+	bytes of the arrays of a columnar dataset, or the serialized rows."""
+	if isinstance(data, Columns):
+		for column in data.columns:
+			digest.update(str(column.dtype).encode("ascii") + str(column.shape).encode("ascii"))
+			digest.update(marshal.dumps(column.tolist()) if column.dtype.kind == "O" else column.tobytes())
+		for names in getattr(data, "names", []):
+			digest.update(marshal.dumps(None if names is None else names.tolist()))
+	else:
+		try:
+			digest.update(marshal.dumps(data))
+		except ValueError:
+			digest.update(pickle.dumps(data, 2))
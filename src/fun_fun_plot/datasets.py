@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides columnar datasets for plotting."""
+
+import json
+import math
+import os
+from array import array
+from functools import reduce
+from itertools import islice
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+def ffp_is_array(obj):
+	"""This function checks if an object is a NumPy array."""
+	return numpy is not None and isinstance(obj, numpy.ndarray)
+
+def ffp_array(values):
+	"""This function returns a NumPy array of arbitrary objects."""
+	array = numpy.empty(len(values), dtype = object)
+	array[:] = values
+	return array
+
+def ffp_bounds(low, high):
+	"""This function returns the minimum and maximum values of two arrays."""
+	return float(numpy.minimum(low, high).min()), float(numpy.maximum(low, high).max())
+
+def ffp_where(condition, x, y):
+	"""This function returns x where the condition holds and y elsewhere,
+	for single values or arrays."""
+	if ffp_is_array(condition):
+		return numpy.where(condition, x, y)
+	return x if condition else y
+
+def ffp_lengths(values):
+	"""This function returns the length of a string or of each string of an array."""
+	if ffp_is_array(values):
+		return numpy.fromiter(map(len, values), float, len(values))
+	return len(values)
+
+def ffp_values(values):
+	"""This function returns the array of the values computed for each row."""
+	array = numpy.asarray(values)
+	return ffp_array(values) if array.ndim != 1 else array
+
+def ffp_rows(operation, plot, data, offset):
+	"""This function evaluates an operation row by row over a columnar dataset."""
+	return ffp_values(list(map(lambda elem: operation(plot, data, elem, offset), range(len(data)))))
+
+def ffp_map(function, rows, length, *args):
+	"""This function calls a function row by row over a columnar dataset,
+	with the value of the row of the arguments marked in rows and the whole
+	value of the others."""
+	return ffp_values(list(map(lambda elem: function(*[x[elem] if row and ffp_is_array(x) else x
+		for x, row in zip(args, rows)]), range(length))))
+
+def ffp_runs(values, length):
+	"""This function returns the ends of the runs of consecutive rows
+	where none of the arrays among the values changes."""
+	ends = set([length])
+	for value in values:
+		if ffp_is_array(value) and length > 1:
+			ends.update((numpy.flatnonzero(value[1:] != value[:-1]) + 1).tolist())
+	return sorted(ends)
+
+def ffp_decimated_rows(values, length):
+	"""This function returns the indices of the rows to draw at pixel
+	resolution: of the rows where all the values round to the same
+	pixels, only the last one is kept."""
+	if length == 0:
+		return numpy.arange(0)
+	keys = [numpy.zeros(length, dtype = numpy.int64)]
+	for value in values:
+		if not ffp_is_array(value):
+			continue
+		if value.dtype.kind in "biuf":
+			keys.append(numpy.rint(value))
+		else:
+			keys.append(numpy.unique(value, return_inverse = True)[1])
+	keys = numpy.stack(keys, axis = 1)
+	first = numpy.unique(keys[::-1], axis = 0, return_index = True)[1]
+	return numpy.sort(length - 1 - first)
+
+def ffp_column(value):
+	"""This function returns an empty column for values of the same type:
+	an array for floats and integers, and a list for any other value."""
+	if type(value) is float:
+		return array("d")
+	if type(value) is int:
+		return array("l")
+	return []
+
+def ffp_append(column, value):
+	"""This function appends a value to a column, turning the column into
+	a list when the value does not fit in the array."""
+	if isinstance(column, array):
+		try:
+			if type(value) is (float if column.typecode == "d" else int):
+				column.append(value)
+				return column
+		except OverflowError:
+			pass
+		column = list(column)
+	column.append(value)
+	return column
+
+def ffp_shift(values, first, length):
+	"""This function returns, for each row, the value of the previous row,
+	and the first value for the first row."""
+	values = numpy.asarray(values)
+	if values.ndim == 0:
+		values = numpy.repeat(values, length)
+	return numpy.concatenate([numpy.asarray([first]), values[:length-1]])
+
+def ffp_scan(first, values, length):
+	"""This function returns, for each row, the first value plus the sum of
+	the values of all the rows up to it."""
+	return first + numpy.cumsum(numpy.broadcast_to(values, (length,)))
+
+def ffp_str(value):
+	"""This function converts each value of an array to a string."""
+	if not ffp_is_array(value):
+		return str(value)
+	return ffp_array(list(map(str, value.tolist())))
+
+def ffp_round(value):
+	"""This function rounds the halves away from zero, as the round function
+	of Python 2, instead of to the nearest even value as NumPy."""
+	return numpy.sign(value) * numpy.floor(numpy.abs(value) + 0.5)
+
+def ffp_vectorize(function, arity, aggregate = False):
+	"""This function returns the NumPy equivalent of a function called with
+	the given number of arguments, or None if it is not known. The functions
+	reducing a sequence (min, max and sum with a single argument) are only
+	replaced when their argument is a whole column, since otherwise each
+	row holds a sequence."""
+	if numpy is None:
+		return None
+	if isinstance(function, numpy.ufunc) or (getattr(function, "__module__", None) or "").startswith("numpy"):
+		return function
+	if function in [min, max] and arity > 1:
+		ufunc = numpy.minimum if function is min else numpy.maximum
+		return lambda *args: reduce(ufunc, args)
+	reductions = {min: numpy.min, max: numpy.max, sum: numpy.sum}
+	if function in reductions and arity == 1:
+		return reductions[function] if aggregate else None
+	builtins = {abs: numpy.abs, round: ffp_round, str: ffp_str}
+	if function in builtins and arity == 1:
+		return builtins[function]
+	if getattr(math, getattr(function, "__name__", ""), None) is function:
+		ufunc = getattr(numpy, function.__name__, None)
+		if isinstance(ufunc, numpy.ufunc) and ufunc.nin == arity:
+			return ufunc
+	return None
+
+def ffp_encode(values):
+	"""This function returns the distinct values of an array in order of
+	first appearance, and for each element the index of its value."""
+	encoding = getattr(values, "encoding", None)
+	if encoding is not None:
+		return encoding
+	names, first, inverse = numpy.unique(values, return_index = True, return_inverse = True)
+	order = numpy.argsort(first)
+	rank = numpy.empty(len(order), dtype = int)
+	rank[order] = numpy.arange(len(order))
+	return names[order], rank[inverse]
+
+def ffp_write_columns(directory, columns):
+	"""This function writes the columns of a dataset to binary files in a
+	directory, to be read by MappedColumns. The numeric columns are stored
+	as fixed-width little-endian values, and the other ones as the indices
+	of their distinct values, which are stored as JSON strings."""
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+	schema = []
+	length = 0
+	for index, column in enumerate(columns):
+		column = numpy.asarray(column)
+		entry = {"file": "%d.bin" % index}
+		if column.dtype.kind not in "biuf":
+			names, column = ffp_encode(column.astype(object))
+			entry["names"] = list(map(lambda x: x if isinstance(x, type(u"")) else str(x), names))
+			column = column.astype("<i4")
+		entry["dtype"] = column.dtype.newbyteorder("<").str
+		column.astype(entry["dtype"]).tofile(os.path.join(directory, entry["file"]))
+		schema.append(entry)
+		length = len(column)
+	with open(os.path.join(directory, "columns.json"), "w") as f:
+		json.dump({"length": length, "columns": schema}, f)
+
+
+
+class Columns:
+	"""This class stores a dataset by columns, so operators can be evaluated
+	once over whole NumPy arrays instead of once per row."""
+	
+	def __init__(self, columns):
+		if numpy is None:
+			raise ImportError("columnar datasets require NumPy")
+		self.columns = list(map(numpy.asarray, columns))
+		for index, column in enumerate(self.columns):
+			if column.dtype.kind in "SU":
+				self.columns[index] = column.astype(object)
+	
+	def __len__(self):
+		"""This method returns the number of rows."""
+		return len(self.columns[0]) if self.columns else 0
+	
+	def __getitem__(self, index):
+		"""This method returns the row at the given index."""
+		return list(map(lambda column: column[index], self.columns))
+	
+	def __iter__(self):
+		"""This method iterates over the rows."""
+		for index in range(len(self)):
+			yield self[index]
+	
+	def column(self, n):
+		"""This method returns the n-th column."""
+		return self.columns[int(n)]
+	
+	def index(self):
+		"""This method returns the indices of the rows."""
+		return numpy.arange(len(self), dtype = float)
+	
+	def value(self):
+		"""This method returns the values of the rows."""
+		if len(self.columns) == 1:
+			return self.column(0)
+		return ffp_array(list(self))
+
+
+
+class Labels(object if numpy is None else numpy.ndarray):
+	"""This class represents an array of strings decoded from the indices of
+	their distinct values, which are kept as its encoding."""
+	
+	encoding = None
+
+
+
+class MappedColumns(Columns):
+	"""This class reads a columnar dataset written by ffp_write_columns. The
+	files are mapped in memory, so the numeric columns are not read until
+	they are used, nor copied. The columns of strings are decoded when
+	they are used, keeping their encoding for ClassColor."""
+	
+	def __init__(self, directory):
+		if numpy is None:
+			raise ImportError("columnar datasets require NumPy")
+		with open(os.path.join(directory, "columns.json")) as f:
+			schema = json.load(f)
+		length = schema["length"]
+		self.columns, self.names, self.labels = [], [], dict([])
+		for entry in schema["columns"]:
+			path = os.path.join(directory, entry["file"])
+			dtype = numpy.dtype(str(entry["dtype"]))
+			self.columns.append(numpy.memmap(path, dtype, "r", shape = (length,)) if length else numpy.zeros(0, dtype))
+			names = entry.get("names")
+			if names is not None:
+				names = ffp_array(list(map(lambda x: x if isinstance(x, str) else x.encode("utf-8"), names)))
+			self.names.append(names)
+	
+	def __getitem__(self, index):
+		"""This method returns the row at the given index."""
+		return list(map(lambda column, names: column[index] if names is None else names[column[index]],
+			self.columns, self.names))
+	
+	def column(self, n):
+		"""This method returns the n-th column."""
+		n = int(n)
+		if self.names[n] is None:
+			return self.columns[n]
+		if n not in self.labels:
+			labels = self.names[n][self.columns[n]].view(Labels)
+			labels.encoding = (self.names[n], self.columns[n])
+			self.labels[n] = labels
+		return self.labels[n]
+
+
+
+class Styles:
+	"""This class interns the styles (tuples of style attributes) used in a
+	draw, mapping each distinct style to a small integer, and stores the
+	pens (colors, fonts...) prepared by the interface for each style."""
+	
+	def __init__(self):
+		self.ids = dict([])
+		self.styles = []
+		self.pens = dict([])
+	
+	def intern(self, style):
+		"""This method returns the integer of a style."""
+		id = self.ids.get(style)
+		if id is None:
+			id = self.ids[style] = len(self.styles)
+			self.styles.append(style)
+		return id
+	
+	def pen(self, prepare, *style):
+		"""This method returns the pen of a style, calling the prepare function
+		of the interface with the style only the first time."""
+		key = (prepare, style)
+		try:
+			return self.pens[key]
+		except KeyError:
+			pen = self.pens[key] = prepare(*style)
+			return pen
+
+
+
+class Rows:
+	"""This class stores the graphical components evaluated for each row of
+	a dataset. When all of them are shapes of the same type, they are stored
+	by attributes, in arrays for the numeric ones, and rebuilt on access.
+	Their style attributes are stored as the integer of the style."""
+	
+	def __init__(self, offset, styles):
+		self.offset = offset
+		self.styles = styles
+		self.kind = None
+		self.size = 0
+		self.columns = None
+		self.elements = None
+		self.length = 0
+	
+	def __len__(self):
+		"""This method returns the number of rows."""
+		return self.length
+	
+	def __getitem__(self, index):
+		"""This method returns the graphical component of the given row."""
+		if self.elements is not None:
+			return self.elements[index]
+		element = self.kind(*(list(map(lambda column: column[index], self.columns[:-1])) +
+			list(self.styles.styles[self.columns[-1][index]])))
+		element.offset = self.offset
+		return element
+	
+	def __iter__(self):
+		"""This method iterates over the graphical components of the rows."""
+		for index in range(self.length):
+			yield self[index]
+	
+	def append(self, element):
+		"""This method adds the graphical component of the next row."""
+		if self.length == 0 and element.batch is None:
+			self.elements = []
+		elif self.length == 0:
+			self.kind = element.__class__
+			self.size = len(element.get_geometry())
+			self.columns = list(map(ffp_column, element.get_attributes()[:self.size])) + [array("l")]
+		elif self.elements is None and element.__class__ is not self.kind:
+			self.elements = list(self)
+		if self.elements is None:
+			attributes = element.get_attributes()
+			for index, value in enumerate(attributes[:self.size]):
+				self.columns[index] = ffp_append(self.columns[index], value)
+			self.columns[-1].append(self.styles.intern(tuple(attributes[self.size:])))
+		else:
+			self.elements.append(element)
+		self.length += 1
+
+
+
+class Stream:
+	"""This class reads a dataset from an iterable by chunks of rows, so only
+	one chunk is held in memory at a time. Unless the plot declares its
+	domain, the rows are read twice, so the iterable cannot be an iterator."""
+	
+	def __init__(self, rows, chunk = 1024):
+		self.rows = rows
+		self.chunk = chunk
+		self.start = 0
+		self.buffer = []
+		self.reads = 0
+	
+	def __len__(self):
+		"""This method fails, since the number of rows is unknown."""
+		raise TypeError("the length of a stream is unknown")
+	
+	def __getitem__(self, index):
+		"""This method returns the row at the given index of the current chunk."""
+		return self.buffer[index - self.start]
+	
+	def __iter__(self):
+		"""This method fails, since a stream can only be read by chunks."""
+		raise TypeError("a stream can only be read by chunks")
+	
+	def chunks(self):
+		"""This method reads the rows by chunks, yielding the indices of the
+		rows of each chunk."""
+		iterator = iter(self.rows)
+		if iterator is self.rows and self.reads > 0:
+			raise ValueError("an iterator can only be read once, declare the domain of the plot")
+		self.reads += 1
+		self.start, self.buffer = 0, list(islice(iterator, self.chunk))
+		while self.buffer:
+			yield range(self.start, self.start + len(self.buffer))
+			self.start += len(self.buffer)
+			self.buffer = list(islice(iterator, self.chunk))
+
+
+
+class Sweep:
+	"""This class stores the data of a plot while a graphical component is
+	evaluated at once over all the rows of a columnar dataset. A key read
+	before being stored in a row takes the value stored in the previous row
+	by the last sweep over the rows, so the sweeps are repeated until the
+	values read from previous rows do not change. The keys accumulated from
+	row to row are computed with prefix sums instead."""
+	
+	def __init__(self, data, length, scans):
+		self.data = data
+		self.original = dict(data)
+		self.initial = dict(data)
+		self.length = length
+		# The columns stored by a previous evaluation end with the value of the last row
+		for key, value in data.items():
+			if ffp_is_array(value) and value.ndim == 1 and len(value) == length:
+				self.initial[key] = value[-1]
+		self.scans = scans
+		self.last = dict([])
+		self.written = set()
+		self.crossed = set()
+	
+	def get(self, key, default):
+		"""This method returns the value of the key for each row."""
+		if key in self.written:
+			return self.data[key]
+		self.crossed.add(key)
+		if key in self.last:
+			return ffp_shift(self.last[key], self.initial.get(key, default), self.length)
+		return self.initial.get(key, default)
+	
+	def store(self, key, value):
+		"""This method stores the value of the key for each row."""
+		self.data[key] = value
+		self.written.add(key)
+		return value
+	
+	def accumulate(self, key, value, default):
+		"""This method stores the value of the key plus the given value."""
+		if key not in self.written and key in self.scans:
+			return self.store(key, ffp_scan(self.initial.get(key, default), value, self.length))
+		return self.store(key, self.get(key, default) + value)
+	
+	def restore(self):
+		"""This method restores the data of the plot stored before the sweeps."""
+		self.data.clear()
+		self.data.update(self.original)
+	
+	def next(self):
+		"""This method ends a sweep, returning whether the values read from
+		previous rows would be the same in a new sweep."""
+		stored = dict(map(lambda key: (key, self.data[key]), self.written))
+		done = all(map(lambda key: (key in stored) == (key in self.last) and
+			(key not in stored or numpy.array_equal(stored[key], self.last[key])),
+			self.crossed))
+		self.last, self.written, self.crossed = stored, set(), set()
+		return done
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides a cache of decoded images shared by the interfaces."""
+
+import os
+from collections import OrderedDict
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+class ImageCache:
+	"""This class stores decoded images by path and modification time,
+	dropping the least recently used ones when their sizes exceed the
+	budget in bytes."""
+	
+	def __init__(self, budget = 64 * 1024 * 1024):
+		self.budget = budget
+		self.size = 0
+		self.images = OrderedDict()
+	
+	def get(self, path, decode, owner = None):
+		"""This method returns the image of the path decoded for the owner
+		(the interface or the resource the image belongs to). The decode
+		function returns the image and its size in bytes."""
+		path = os.path.abspath(path)
+		key = (owner, path, os.path.getmtime(path))
+		if key in self.images:
+			image, size = self.images.pop(key)
+		else:
+			for old in [k for k in self.images if k[:2] == key[:2]]:
+				self.size -= self.images.pop(old)[1]
+			image, size = decode(path)
+			self.size += size
+		self.images[key] = (image, size)
+		while self.size > self.budget and len(self.images) > 1:
+			self.size -= self.images.popitem(last = False)[1][1]
+		return image
+	
+	def clear(self):
+		"""This method drops all the images."""
+		self.images.clear()
+		self.size = 0
+
+
+
+# This object caches the images of all the interfaces.
+ffp_images = ImageCache()
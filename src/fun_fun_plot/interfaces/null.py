@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides an interface that draws nothing, to measure the
+evaluation of plots without the cost of a graphics library."""
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+def __null_canvas(width, height):
+	"""This function creates an empty canvas."""
+	return None
+
+def __null_primitive(plot, *args):
+	"""This function ignores a primitive."""
+	pass
+
+
+
+# This dictionary stores all the primitives of the null interface,
+# including the batched ones.
+ffp_null = {
+	"canvas": __null_canvas,
+	"clear": __null_primitive,
+	"after": __null_primitive,
+	"line": __null_primitive,
+	"pie": __null_primitive,
+	"arc": __null_primitive,
+	"circle": __null_primitive,
+	"rectangle": __null_primitive,
+	"text": __null_primitive,
+	"image": __null_primitive,
+	"lines": __null_primitive,
+	"circles": __null_primitive,
+	"pies": __null_primitive,
+	"arcs": __null_primitive,
+	"rectangles": __null_primitive,
+	"texts": __null_primitive
+}
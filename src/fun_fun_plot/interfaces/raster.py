@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides a headless interface that rasterizes the plots
+into an in-memory pixel buffer and encodes them as PNG images."""
+
+import struct
+import zlib
+from math import ceil, floor, sqrt, sin, cos, radians
+
+from images import ffp_images
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+# This dictionary stores the RGB values of the named colors
+ffp_colors = {
+	"white": (255, 255, 255),
+	"black": (0, 0, 0),
+	"red": (255, 0, 0),
+	"green": (0, 255, 0),
+	"blue": (0, 0, 255),
+	"yellow": (255, 255, 0),
+	"orange": (255, 165, 0),
+	"pink": (255, 192, 203),
+	"purple": (160, 32, 240),
+	"brown": (165, 42, 42),
+	"cyan": (0, 255, 255),
+	"magenta": (255, 0, 255),
+	"gray": (190, 190, 190),
+	"grey": (190, 190, 190)
+}
+
+# This string stores a 5x8 bitmap font for the printable ASCII characters,
+# five columns per character where the lowest bit is the top pixel
+ffp_font = (
+	"0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12" "2313086462"
+	"3649562050" "0008070300" "001c224100" "0041221c00" "2a1c7f1c2a" "08083e0808"
+	"0080703000" "0808080808" "0000606000" "2010080402" "3e5149453e" "00427f4000"
+	"7249494946" "2141494d33" "1814127f10" "2745454539" "3c4a494931" "4121110907"
+	"3649494936" "464949291e" "0000140000" "0040340000" "0008142241" "1414141414"
+	"0041221408" "0201590906" "3e415d594e" "7c1211127c" "7f49494936" "3e41414122"
+	"7f4141413e" "7f49494941" "7f09090901" "3e41415173" "7f0808087f" "00417f4100"
+	"2040413f01" "7f08142241" "7f40404040" "7f021c027f" "7f0408107f" "3e4141413e"
+	"7f09090906" "3e4151215e" "7f09192946" "2649494932" "03017f0103" "3f4040403f"
+	"1f2040201f" "3f4038403f" "6314081463" "0304780403" "6159494d43" "007f414141"
+	"0204081020" "004141417f" "0402010204" "4040404040" "0003070800" "2054547840"
+	"7f28444438" "3844444428" "384444287f" "3854545418" "00087e0902" "18a4a49c78"
+	"7f08040478" "00447d4000" "2040403d00" "7f10284400" "00417f4000" "7c04780478"
+	"7c08040478" "3844444438" "fc18242418" "18242418fc" "7c08040408" "4854545424"
+	"04043f4424" "3c4040207c" "1c2040201c" "3c4030403c" "4428102844" "4c9090907c"
+	"4464544c44" "0008364100" "0000770000" "0041360800" "0201020402")
+
+
+
+def ffp_rgb(color):
+	"""This function returns the RGB bytes of a color name or code."""
+	if color.startswith("#") and len(color) == 7:
+		rgb = (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
+	elif color.startswith("#") and len(color) == 4:
+		rgb = (int(color[1], 16)*17, int(color[2], 16)*17, int(color[3], 16)*17)
+	else:
+		rgb = ffp_colors.get(color.lower(), (0, 0, 0))
+	return bytearray(rgb)
+
+def ffp_png(width, height, pixels, level = 6):
+	"""This function encodes an RGB pixel buffer as a PNG image."""
+	stride = width * 3
+	raw = b"".join(map(
+		lambda j: b"\x00" + bytes(pixels[j*stride:(j+1)*stride]),
+		range(height)))
+	return b"".join([
+		b"\x89PNG\r\n\x1a\n",
+		__png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+		__png_chunk(b"IDAT", zlib.compress(raw, level)),
+		__png_chunk(b"IEND", b"")])
+
+def __png_chunk(tag, data):
+	"""This function returns a PNG chunk."""
+	return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+def ffp_read_png(path):
+	"""This function decodes a non-interlaced 8-bit PNG file into a raster."""
+	with open(path, "rb") as f:
+		content = f.read()
+	if content[:8] != b"\x89PNG\r\n\x1a\n":
+		raise ValueError("%s is not a PNG image" % path)
+	position, chunks, palette = 8, [], None
+	while position < len(content):
+		length, tag = struct.unpack(">I4s", content[position:position+8])
+		chunk = content[position+8:position+8+length]
+		position += length + 12
+		if tag == b"IHDR":
+			width, height, depth, kind, _, _, interlace = struct.unpack(">IIBBBBB", chunk)
+		elif tag == b"PLTE":
+			palette = bytearray(chunk)
+		elif tag == b"IDAT":
+			chunks.append(chunk)
+		elif tag == b"IEND":
+			break
+	channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(kind)
+	if depth != 8 or interlace != 0 or channels is None:
+		raise ValueError("%s is not a supported PNG image" % path)
+	raw = bytearray(zlib.decompress(b"".join(chunks)))
+	stride = width * channels
+	image = Raster(width, height)
+	previous = bytearray(stride)
+	for j in range(height):
+		start = j * (stride + 1)
+		line = __png_unfilter(raw[start], raw[start+1:start+1+stride], previous, channels)
+		image.pixels[j*width*3:(j+1)*width*3] = __png_rgb(line, kind, palette)
+		previous = line
+	return image
+
+def __png_unfilter(kind, line, previous, channels):
+	"""This function reverses the filter of a row of a PNG image."""
+	if kind == 1:
+		for i in range(channels, len(line)):
+			line[i] = (line[i] + line[i-channels]) & 255
+	elif kind == 2:
+		for i in range(len(line)):
+			line[i] = (line[i] + previous[i]) & 255
+	elif kind == 3:
+		for i in range(len(line)):
+			left = line[i-channels] if i >= channels else 0
+			line[i] = (line[i] + ((left + previous[i]) >> 1)) & 255
+	elif kind == 4:
+		for i in range(len(line)):
+			a = line[i-channels] if i >= channels else 0
+			b = previous[i]
+			c = previous[i-channels] if i >= channels else 0
+			p = a + b - c
+			pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+			if pa <= pb and pa <= pc:
+				predictor = a
+			elif pb <= pc:
+				predictor = b
+			else:
+				predictor = c
+			line[i] = (line[i] + predictor) & 255
+	return line
+
+def __png_rgb(line, kind, palette):
+	"""This function converts a row of a PNG image to RGB, blending the
+	transparent pixels with a white background."""
+	if kind == 2:
+		return line
+	rgb = bytearray()
+	if kind == 0:
+		for gray in line:
+			rgb += bytearray((gray, gray, gray))
+	elif kind == 3:
+		for index in line:
+			rgb += palette[index*3:index*3+3]
+	elif kind == 4:
+		for i in range(0, len(line), 2):
+			gray = (line[i] * line[i+1] + 255 * (255 - line[i+1])) // 255
+			rgb += bytearray((gray, gray, gray))
+	else:
+		for i in range(0, len(line), 4):
+			alpha = line[i+3]
+			rgb += bytearray(map(lambda c: (c * alpha + 255 * (255 - alpha)) // 255, line[i:i+3]))
+	return rgb
+
+def __intersect(spans, low, high):
+	"""This function returns the parts of the spans between low and high."""
+	return [(max(x0, low), min(x1, high)) for x0, x1 in spans if max(x0, low) < min(x1, high)]
+
+def __subtract(spans, low, high):
+	"""This function returns the parts of the spans outside low and high."""
+	if low >= high:
+		return spans
+	return __intersect(spans, float("-inf"), low) + __intersect(spans, high, float("inf"))
+
+def __halfplane(a, b):
+	"""This function returns the interval of values x such that a*x + b >= 0."""
+	if a > 0:
+		return -b / a, float("inf")
+	if a < 0:
+		return float("-inf"), -b / a
+	return (float("-inf"), float("inf")) if b >= 0 else (float("inf"), float("-inf"))
+
+def __wedge(x, y, alpha, beta, py):
+	"""This function returns the interval of the row py inside the sector
+	centered at (x,y) from the angle alpha with extent beta <= 180."""
+	ux, uy = cos(radians(alpha)), sin(radians(alpha))
+	vx, vy = cos(radians(alpha + beta)), sin(radians(alpha + beta))
+	dy = py - y
+	low0, high0 = __halfplane(-uy, ux * dy)
+	low1, high1 = __halfplane(vy, -dy * vx)
+	return x + max(low0, low1), x + min(high0, high1)
+
+def __sector(spans, x, y, alpha, beta, py):
+	"""This function returns the parts of the spans of the row py inside
+	the sector centered at (x,y) from the angle alpha with extent beta."""
+	if abs(beta) >= 360:
+		return spans
+	if beta < 0:
+		alpha, beta = alpha + beta, -beta
+	if beta <= 180:
+		return __intersect(spans, *__wedge(x, y, alpha, beta, py))
+	return __subtract(spans, *__wedge(x, y, alpha + beta, 360 - beta, py))
+
+def __disk(x, y, radius, py):
+	"""This function returns the span of the row py inside a disk."""
+	dy = py - y
+	if radius <= 0 or dy * dy > radius * radius:
+		return []
+	dx = sqrt(radius * radius - dy * dy)
+	return [(x - dx, x + dx)]
+
+def __ring(x, y, radius, width, py):
+	"""This function returns the spans of the row py inside a ring."""
+	outer = __disk(x, y, radius + width / 2.0, py)
+	inner = __disk(x, y, radius - width / 2.0, py)
+	if not outer or not inner:
+		return outer
+	return [(outer[0][0], inner[0][0]), (inner[0][1], outer[0][1])]
+
+def __style(background, border, width):
+	"""This function returns the fill and outline colors and the outline
+	width of a round shape."""
+	width = 1 if width is None else width
+	border = "black" if border is None else border
+	fill = ffp_rgb(background) if background else None
+	line = ffp_rgb(border) if border and width > 0 else None
+	return fill, line, width
+
+def __rectangle_style(background, border, width):
+	"""This function returns the fill and outline colors and the outline
+	width of a rectangle."""
+	width = 1 if width is None else width
+	fill = ffp_rgb(background) if background else None
+	line = ffp_rgb("black" if border is None else border) if width > 0 and border != "" else None
+	return fill, line, width
+
+def __line_style(border, width):
+	"""This function returns the color and the width of a line."""
+	width = 1 if width is None else width
+	return ffp_rgb("black" if border is None else border) if width > 0 else None, width
+
+
+
+class Raster:
+	"""This class stores an RGB pixel buffer where the rows are stored
+	from top to bottom, while the ordinates grow from bottom to top."""
+	
+	def __init__(self, width, height, background = "white"):
+		self.width = int(width)
+		self.height = int(height)
+		self.background = ffp_rgb(background) * (self.width * self.height)
+		self.pixels = bytearray(self.background)
+	
+	def clear(self):
+		"""This method fills the pixel buffer with the background color."""
+		self.pixels[:] = self.background
+	
+	def rows(self, y0, y1):
+		"""This method returns the rows whose centers lie in [y0, y1),
+		along with the ordinates of their centers."""
+		first = max(0, int(floor(self.height - y1 - 0.5)) + 1)
+		last = min(self.height - 1, int(floor(self.height - y0 - 0.5)))
+		return [(j, self.height - j - 0.5) for j in range(first, last + 1)]
+	
+	def span(self, j, x0, x1, rgb):
+		"""This method fills the pixels of the row j whose centers lie in [x0, x1)."""
+		first = max(0, int(ceil(x0 - 0.5)))
+		last = min(self.width, int(ceil(x1 - 0.5)))
+		if first < last:
+			start = (j * self.width + first) * 3
+			self.pixels[start:start + (last - first) * 3] = rgb * (last - first)
+	
+	def rectangle(self, x0, y0, x1, y1, rgb):
+		"""This method fills a rectangle."""
+		x0, x1 = min(x0, x1), max(x0, x1)
+		for j, _ in self.rows(min(y0, y1), max(y0, y1)):
+			self.span(j, x0, x1, rgb)
+	
+	def line(self, x0, y0, x1, y1, width, rgb):
+		"""This method draws a line stamping squares of the given width."""
+		half = max(width, 1) / 2.0
+		steps = max(1, int(ceil(max(abs(x1 - x0), abs(y1 - y0)))))
+		for i in range(steps + 1):
+			x = x0 + (x1 - x0) * i / float(steps)
+			y = y0 + (y1 - y0) * i / float(steps)
+			self.rectangle(x - half, y - half, x + half, y + half, rgb)
+	
+	def paste(self, image, x, y):
+		"""This method copies an image with its top left corner at the pixel (x,y)."""
+		x, y = int(x), int(y)
+		first, last = max(0, x), min(self.width, x + image.width)
+		if first >= last:
+			return
+		for j in range(max(0, y), min(self.height, y + image.height)):
+			source = ((j - y) * image.width + first - x) * 3
+			target = (j * self.width + first) * 3
+			self.pixels[target:target + (last - first) * 3] = image.pixels[source:source + (last - first) * 3]
+	
+	def png(self, level = 6):
+		"""This method returns the PNG encoding of the pixel buffer."""
+		return ffp_png(self.width, self.height, self.pixels, level)
+	
+	def save(self, path, level = 6):
+		"""This method writes the PNG encoding of the pixel buffer to a file."""
+		with open(path, "wb") as f:
+			f.write(self.png(level))
+
+
+
+def __raster_canvas(width, height):
+	"""This function creates a new raster."""
+	return Raster(width, height)
+
+def __raster_clear(plot):
+	"""This function clears the raster for a new draw."""
+	plot.canvas.clear()
+
+def __raster_after(plot):
+	"""This function does nothing, the raster is encoded on demand."""
+	pass
+
+def __raster_encode(plot):
+	"""This function returns the PNG encoding of the raster."""
+	return plot.canvas.png()
+
+def __raster_line(plot, x, y, fx, fy, border, width):
+	"""This function draws a line in the raster."""
+	__raster_lines(plot, [x], [y], [fx], [fy], border, width)
+
+def __raster_lines(plot, xs, ys, fxs, fys, border, width):
+	"""This function draws many lines sharing the same style in the raster."""
+	line, width = plot.styles.pen(__line_style, border, width)
+	if line:
+		for x, y, fx, fy in zip(xs, ys, fxs, fys):
+			plot.canvas.line(x, y, fx, fy, width, line)
+
+def __raster_pie(plot, x, y, radius, alpha, beta, background, border, width):
+	"""This function draws a sector in the raster."""
+	fill, line, width = plot.styles.pen(__style, background, border, width)
+	for j, py in plot.canvas.rows(y - radius - width, y + radius + width):
+		if fill:
+			for x0, x1 in __sector(__disk(x, y, radius, py), x, y, alpha, beta, py):
+				plot.canvas.span(j, x0, x1, fill)
+		if line:
+			for x0, x1 in __sector(__ring(x, y, radius, width, py), x, y, alpha, beta, py):
+				plot.canvas.span(j, x0, x1, line)
+	if line and abs(beta) < 360:
+		for angle in (alpha, alpha + beta):
+			plot.canvas.line(x, y,
+				x + radius * cos(radians(angle)),
+				y + radius * sin(radians(angle)), width, line)
+
+def __raster_arc(plot, x, y, radius, alpha, beta, background, border, width):
+	"""This function draws an arc in the raster."""
+	fill, line, width = plot.styles.pen(__style, background, border, width)
+	if line:
+		for j, py in plot.canvas.rows(y - radius - width, y + radius + width):
+			for x0, x1 in __sector(__ring(x, y, radius, width, py), x, y, alpha, beta, py):
+				plot.canvas.span(j, x0, x1, line)
+
+def __raster_circle(plot, x, y, radius, background, border, width):
+	"""This function draws a circle in the raster."""
+	__raster_circles(plot, [x], [y], [radius], background, border, width)
+
+def __raster_circles(plot, xs, ys, radii, background, border, width):
+	"""This function draws many circles sharing the same style in the raster."""
+	fill, line, width = plot.styles.pen(__style, background, border, width)
+	for x, y, radius in zip(xs, ys, radii):
+		for j, py in plot.canvas.rows(y - radius - width, y + radius + width):
+			if fill:
+				for x0, x1 in __disk(x, y, radius, py):
+					plot.canvas.span(j, x0, x1, fill)
+			if line:
+				for x0, x1 in __ring(x, y, radius, width, py):
+					plot.canvas.span(j, x0, x1, line)
+
+def __raster_rectangle(plot, x, y, dx, dy, background, border, width):
+	"""This function draws a rectangle in the raster."""
+	__raster_rectangles(plot, [x], [y], [dx], [dy], background, border, width)
+
+def __raster_rectangles(plot, xs, ys, dxs, dys, background, border, width):
+	"""This function draws many rectangles sharing the same style in the raster."""
+	fill, line, width = plot.styles.pen(__rectangle_style, background, border, width)
+	half = width / 2.0
+	for x, y, dx, dy in zip(xs, ys, dxs, dys):
+		if fill:
+			plot.canvas.rectangle(x, y, x + dx, y + dy, fill)
+		if line:
+			x0, x1 = min(x, x + dx), max(x, x + dx)
+			y0, y1 = min(y, y + dy), max(y, y + dy)
+			plot.canvas.rectangle(x0 - half, y0 - half, x1 + half, y0 + half, line)
+			plot.canvas.rectangle(x0 - half, y1 - half, x1 + half, y1 + half, line)
+			plot.canvas.rectangle(x0 - half, y0 - half, x0 + half, y1 + half, line)
+			plot.canvas.rectangle(x1 - half, y0 - half, x1 + half, y1 + half, line)
+
+def __raster_text(plot, x, y, text, family, size, color, align):
+	"""This function draws a text in the raster with a bitmap font."""
+	scale = max(1, int(round(size / 8.0)))
+	rgb = plot.styles.pen(ffp_rgb, "black" if color is None else color)
+	length = (len(text) * 6 - 1) * scale
+	if align == "left":
+		left = x
+	elif align == "right":
+		left = x - length
+	else:
+		left = x - length / 2.0
+	top = y + 4 * scale
+	for index, char in enumerate(text):
+		code = ord(char) if 32 <= ord(char) < 127 else ord("?")
+		glyph = ffp_font[(code - 32) * 10:(code - 31) * 10]
+		for column in range(5):
+			bits = int(glyph[column*2:column*2+2], 16)
+			x0 = left + (index * 6 + column) * scale
+			for row in range(8):
+				if bits & (1 << row):
+					plot.canvas.rectangle(x0, top - (row + 1) * scale, x0 + scale, top - row * scale, rgb)
+
+def __raster_decode(path):
+	"""This function decodes an image for the cache of images."""
+	image = ffp_read_png(path)
+	return image, len(image.pixels) + len(image.background)
+
+def __raster_image(plot, x, y, path):
+	"""This function draws an image in the raster."""
+	plot.canvas.paste(ffp_images.get(path, __raster_decode, "raster"), x, y)
+
+
+
+# This dictionary stores all the primitives of the raster interface.
+ffp_raster = {
+	"canvas": __raster_canvas,
+	"clear": __raster_clear,
+	"after": __raster_after,
+	"encode": __raster_encode,
+	"line": __raster_line,
+	"pie": __raster_pie,
+	"arc": __raster_arc,
+	"circle": __raster_circle,
+	"rectangle": __raster_rectangle,
+	"text": __raster_text,
+	"image": __raster_image,
+	"lines": __raster_lines,
+	"circles": __raster_circles,
+	"rectangles": __raster_rectangles
+}
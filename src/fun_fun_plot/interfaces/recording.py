@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides an interface that records the primitives called to
+draw a plot in a display list, which can be replayed with any interface and
+serialized to a compact binary format."""
+
+import numbers
+import struct
+from array import array
+from functools import partial
+
+from fun_fun_plot.datasets import ffp_append, ffp_column
+from fun_fun_plot.primitives import Plot
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+# This dictionary stores, for each batched primitive, the primitive that
+# draws a single shape and the number of geometric attributes.
+ffp_batches = {
+	"lines": ("line", 4),
+	"circles": ("circle", 3),
+	"pies": ("pie", 5),
+	"arcs": ("arc", 5),
+	"rectangles": ("rectangle", 4),
+	"texts": ("text", 3)
+}
+
+# This variable stores the first bytes of a serialized display list.
+ffp_magic = b"FFPD\x01"
+
+# This variable stores the type of the text strings.
+ffp_text = type(u"")
+
+
+
+class DisplayList:
+	"""This class stores the primitives (name and arguments without the
+	plot) called to draw a plot of the given size, in order. The sequences
+	of numbers are stored as arrays."""
+	
+	def __init__(self, width, height, calls = None):
+		self.width = width
+		self.height = height
+		self.calls = [] if calls is None else calls
+	
+	def append(self, name, args):
+		"""This method records a call to a primitive."""
+		self.calls.append((name, tuple(map(ffp_compact, args))))
+	
+	def clear(self):
+		"""This method drops all the calls."""
+		del self.calls[:]
+	
+	def __len__(self):
+		return len(self.calls)
+	
+	def __iter__(self):
+		return iter(self.calls)
+
+
+
+def ffp_compact(value):
+	"""This function returns a value to store in a display list: NumPy values
+	become Python values, and sequences of numbers become arrays."""
+	if hasattr(value, "tolist"):
+		value = value.tolist()
+	if isinstance(value, (list, tuple)) and len(value) > 0:
+		column = ffp_column(value[0])
+		for x in value:
+			column = ffp_append(column, x)
+		return column
+	return value
+
+def ffp_replay(display, primitives, canvas = None):
+	"""This function draws a display list with the primitives of an
+	interface as Plot.draw does, and returns the plot holding the canvas.
+	The given canvas is cleared and reused when the interface provides the
+	clear primitive. The batched primitives not provided by the interface
+	are replayed shape by shape."""
+	plot = Plot(None, primitives, display.width, display.height)
+	if canvas is not None and "clear" in primitives:
+		plot.canvas = canvas
+		primitives["clear"](plot)
+	else:
+		plot.canvas = primitives["canvas"](display.width, display.height)
+	for name, args in display.calls:
+		if name in primitives:
+			primitives[name](plot, *args)
+		else:
+			single, length = ffp_batches[name]
+			style = list(args[length:])
+			for geometry in zip(*args[:length]):
+				primitives[single](plot, *(list(geometry) + style))
+	primitives["after"](plot)
+	return plot
+
+def ffp_dumps(display):
+	"""This function serializes a display list to bytes."""
+	names = sorted(set(name for name, args in display.calls))
+	codes = dict((name, code) for code, name in enumerate(names))
+	out = [ffp_magic]
+	for value in [display.width, display.height, names]:
+		__encode(value, out)
+	out.append(struct.pack("<I", len(display.calls)))
+	for name, args in display.calls:
+		out.append(struct.pack("<BB", codes[name], len(args)))
+		for value in args:
+			__encode(value, out)
+	return b"".join(out)
+
+def ffp_loads(data):
+	"""This function returns the display list serialized in the bytes."""
+	if data[:len(ffp_magic)] != ffp_magic:
+		raise ValueError("the data is not a display list")
+	offset = len(ffp_magic)
+	width, offset = __decode(data, offset)
+	height, offset = __decode(data, offset)
+	names, offset = __decode(data, offset)
+	count, = struct.unpack_from("<I", data, offset)
+	offset += 4
+	calls = []
+	for _ in range(count):
+		code, length = struct.unpack_from("<BB", data, offset)
+		offset += 2
+		args = []
+		for _ in range(length):
+			value, offset = __decode(data, offset)
+			args.append(value)
+		calls.append((names[code], tuple(args)))
+	return DisplayList(width, height, calls)
+
+def __encode(value, out):
+	"""This function appends the bytes of a value, preceded by its type."""
+	if value is None:
+		out.append(b"N")
+	elif value is True or value is False:
+		out.append(b"T" if value else b"F")
+	elif isinstance(value, numbers.Integral):
+		out.append(b"i" + struct.pack("<q", value))
+	elif isinstance(value, numbers.Real):
+		out.append(b"d" + struct.pack("<d", value))
+	elif isinstance(value, ffp_text):
+		value = value.encode("utf-8")
+		out.append(b"u" + struct.pack("<I", len(value)) + value)
+	elif isinstance(value, bytes):
+		out.append(b"s" + struct.pack("<I", len(value)) + value)
+	elif isinstance(value, array) and value.typecode in "dl":
+		tag, code = (b"D", "d") if value.typecode == "d" else (b"L", "q")
+		out.append(tag + struct.pack("<I", len(value)))
+		out.append(struct.pack("<%d%s" % (len(value), code), *value))
+	elif isinstance(value, (list, tuple)):
+		out.append(b"l" + struct.pack("<I", len(value)))
+		for x in value:
+			__encode(x, out)
+	else:
+		raise TypeError("cannot serialize %r" % (value,))
+
+def __decode(data, offset):
+	"""This function returns the value encoded in the bytes at the offset,
+	and the offset of the next value."""
+	tag, offset = data[offset:offset + 1], offset + 1
+	if tag == b"N":
+		return None, offset
+	elif tag == b"T" or tag == b"F":
+		return tag == b"T", offset
+	elif tag == b"i":
+		return struct.unpack_from("<q", data, offset)[0], offset + 8
+	elif tag == b"d":
+		return struct.unpack_from("<d", data, offset)[0], offset + 8
+	length, = struct.unpack_from("<I", data, offset)
+	offset += 4
+	if tag == b"u":
+		return data[offset:offset + length].decode("utf-8"), offset + length
+	elif tag == b"s":
+		return data[offset:offset + length], offset + length
+	elif tag == b"D" or tag == b"L":
+		typecode, code = ("d", "d") if tag == b"D" else ("l", "q")
+		values = struct.unpack_from("<%d%s" % (length, code), data, offset)
+		return array(typecode, values), offset + 8 * length
+	elif tag == b"l":
+		values = []
+		for _ in range(length):
+			value, offset = __decode(data, offset)
+			values.append(value)
+		return values, offset
+	raise ValueError("unknown type %r in the display list" % tag)
+
+def __recording_canvas(width, height):
+	"""This function creates a new display list."""
+	return DisplayList(width, height)
+
+def __recording_clear(plot):
+	"""This function drops the calls of the display list."""
+	plot.canvas.clear()
+
+def __recording_after(plot):
+	pass
+
+def __recording_encode(plot):
+	"""This function returns the display list serialized to bytes."""
+	return ffp_dumps(plot.canvas)
+
+def __recording_primitive(name, plot, *args):
+	"""This function records a call to a primitive in the display list."""
+	plot.canvas.append(name, args)
+
+
+
+# This dictionary stores all the primitives of the recording interface,
+# including the batched ones.
+ffp_recording = {
+	"canvas": __recording_canvas,
+	"clear": __recording_clear,
+	"after": __recording_after,
+	"encode": __recording_encode,
+	"line": partial(__recording_primitive, "line"),
+	"pie": partial(__recording_primitive, "pie"),
+	"arc": partial(__recording_primitive, "arc"),
+	"circle": partial(__recording_primitive, "circle"),
+	"rectangle": partial(__recording_primitive, "rectangle"),
+	"text": partial(__recording_primitive, "text"),
+	"image": partial(__recording_primitive, "image"),
+	"lines": partial(__recording_primitive, "lines"),
+	"circles": partial(__recording_primitive, "circles"),
+	"pies": partial(__recording_primitive, "pies"),
+	"arcs": partial(__recording_primitive, "arcs"),
+	"rectangles": partial(__recording_primitive, "rectangles"),
+	"texts": partial(__recording_primitive, "texts")
+}
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides an interface that streams the plots as SVG documents."""
+
+import gzip
+import io
+import struct
+from functools import partial
+from math import sin, cos, radians
+from xml.sax.saxutils import escape, quoteattr
+
+from images import ffp_images
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+def __svg_number(value):
+	"""This function formats a coordinate."""
+	return ("%.3f" % value).rstrip("0").rstrip(".")
+
+def __svg_write(plot, text):
+	"""This function writes a piece of the document to the stream."""
+	plot.canvas.write(text if isinstance(text, bytes) else text.encode("utf-8"))
+
+def __svg_style(background, border, width):
+	"""This function returns the fill and stroke attributes of a shape."""
+	width = 1 if width is None else width
+	stroke = "black" if border is None else border
+	return 'fill=%s stroke=%s stroke-width="%s"' % (
+		quoteattr(background if background else "none"),
+		quoteattr(stroke if stroke and width > 0 else "none"),
+		__svg_number(width))
+
+def __svg_point(plot, x, y, radius, angle):
+	"""This function returns the point of a circle at the given angle."""
+	return (
+		__svg_number(x + radius * cos(radians(angle))),
+		__svg_number(plot.height - (y + radius * sin(radians(angle)))))
+
+def __svg_sector(plot, x, y, radius, alpha, beta):
+	"""This function returns the path of the arc from alpha with extent beta."""
+	x0, y0 = __svg_point(plot, x, y, radius, alpha)
+	x1, y1 = __svg_point(plot, x, y, radius, alpha + beta)
+	return "%s %s A %s %s 0 %d %d %s %s" % (
+		x0, y0, __svg_number(radius), __svg_number(radius),
+		1 if abs(beta) > 180 else 0, 0 if beta > 0 else 1, x1, y1)
+
+def __svg_canvas(stream, compress, width, height):
+	"""This function starts a new SVG document in the stream, or in
+	memory when there is no stream."""
+	if stream is None:
+		stream = io.BytesIO()
+	elif compress:
+		stream = gzip.GzipFile(fileobj = stream, mode = "wb")
+	stream.write((
+		'<?xml version="1.0" encoding="UTF-8"?>\n'
+		'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+		'width="%d" height="%d" viewBox="0 0 %d %d">\n' % (width, height, width, height)).encode("utf-8"))
+	return stream
+
+def __svg_after(plot):
+	"""This function ends the SVG document."""
+	__svg_write(plot, "</svg>\n")
+	if isinstance(plot.canvas, gzip.GzipFile):
+		plot.canvas.close()
+	else:
+		plot.canvas.flush()
+
+def __svg_encode(compress, plot):
+	"""This function returns the SVG document written in memory."""
+	document = plot.canvas.getvalue()
+	if compress:
+		stream = io.BytesIO()
+		with gzip.GzipFile(fileobj = stream, mode = "wb") as f:
+			f.write(document)
+		document = stream.getvalue()
+	return document
+
+def __svg_line(plot, x, y, fx, fy, border, width):
+	"""This function writes a line."""
+	__svg_write(plot, '<line x1="%s" y1="%s" x2="%s" y2="%s" %s/>\n' % (
+		__svg_number(x), __svg_number(plot.height - y),
+		__svg_number(fx), __svg_number(plot.height - fy),
+		plot.styles.pen(__svg_style, None, border, width)))
+
+def __svg_lines(plot, xs, ys, fxs, fys, border, width):
+	"""This function writes a group of lines sharing the same style."""
+	__svg_write(plot, '<g %s>\n' % plot.styles.pen(__svg_style, None, border, width))
+	for x, y, fx, fy in zip(xs, ys, fxs, fys):
+		__svg_write(plot, '<line x1="%s" y1="%s" x2="%s" y2="%s"/>\n' % (
+			__svg_number(x), __svg_number(plot.height - y),
+			__svg_number(fx), __svg_number(plot.height - fy)))
+	__svg_write(plot, '</g>\n')
+
+def __svg_pie(plot, x, y, radius, alpha, beta, background, border, width):
+	"""This function writes a sector."""
+	if abs(beta) >= 360:
+		return __svg_circle(plot, x, y, radius, background, border, width)
+	__svg_write(plot, '<path d="M %s %s L %s Z" %s/>\n' % (
+		__svg_number(x), __svg_number(plot.height - y),
+		__svg_sector(plot, x, y, radius, alpha, beta),
+		plot.styles.pen(__svg_style, background, border, width)))
+
+def __svg_arc(plot, x, y, radius, alpha, beta, background, border, width):
+	"""This function writes an arc."""
+	if abs(beta) >= 360:
+		return __svg_circle(plot, x, y, radius, None, border, width)
+	__svg_write(plot, '<path d="M %s" %s/>\n' % (
+		__svg_sector(plot, x, y, radius, alpha, beta),
+		plot.styles.pen(__svg_style, None, border, width)))
+
+def __svg_circle(plot, x, y, radius, background, border, width):
+	"""This function writes a circle."""
+	__svg_write(plot, '<circle cx="%s" cy="%s" r="%s" %s/>\n' % (
+		__svg_number(x), __svg_number(plot.height - y), __svg_number(radius),
+		plot.styles.pen(__svg_style, background, border, width)))
+
+def __svg_circles(plot, xs, ys, radii, background, border, width):
+	"""This function writes a group of circles sharing the same style."""
+	__svg_write(plot, '<g %s>\n' % plot.styles.pen(__svg_style, background, border, width))
+	for x, y, radius in zip(xs, ys, radii):
+		__svg_write(plot, '<circle cx="%s" cy="%s" r="%s"/>\n' % (
+			__svg_number(x), __svg_number(plot.height - y), __svg_number(radius)))
+	__svg_write(plot, '</g>\n')
+
+def __svg_rectangle(plot, x, y, dx, dy, background, border, width):
+	"""This function writes a rectangle."""
+	__svg_write(plot, '<rect x="%s" y="%s" width="%s" height="%s" %s/>\n' % (
+		__svg_number(min(x, x + dx)), __svg_number(plot.height - max(y, y + dy)),
+		__svg_number(abs(dx)), __svg_number(abs(dy)),
+		plot.styles.pen(__svg_style, background, border, width)))
+
+def __svg_rectangles(plot, xs, ys, dxs, dys, background, border, width):
+	"""This function writes a group of rectangles sharing the same style."""
+	__svg_write(plot, '<g %s>\n' % plot.styles.pen(__svg_style, background, border, width))
+	for x, y, dx, dy in zip(xs, ys, dxs, dys):
+		__svg_write(plot, '<rect x="%s" y="%s" width="%s" height="%s"/>\n' % (
+			__svg_number(min(x, x + dx)), __svg_number(plot.height - max(y, y + dy)),
+			__svg_number(abs(dx)), __svg_number(abs(dy))))
+	__svg_write(plot, '</g>\n')
+
+def __svg_text(plot, x, y, text, family, size, color, align):
+	"""This function writes a text."""
+	if align == "left":
+		anchor = "start"
+	elif align == "right":
+		anchor = "end"
+	else:
+		anchor = "middle"
+	__svg_write(plot, '<text x="%s" y="%s" font-family=%s font-size="%spt" fill=%s text-anchor="%s" dominant-baseline="central">%s</text>\n' % (
+		__svg_number(x), __svg_number(plot.height - y),
+		quoteattr(family), size, quoteattr("black" if color is None else color),
+		anchor, escape(text)))
+
+def __svg_size(path):
+	"""This function returns the size attributes of a PNG image for the
+	cache of images."""
+	with open(path, "rb") as f:
+		header = f.read(24)
+	if header[:8] == b"\x89PNG\r\n\x1a\n":
+		return ' width="%d" height="%d"' % struct.unpack(">II", header[16:24]), 24
+	return "", 24
+
+def __svg_image(plot, x, y, path):
+	"""This function writes a reference to an image, with the size of
+	PNG images read from their header."""
+	size = ffp_images.get(path, __svg_size, "svg")
+	__svg_write(plot, '<image x="%s" y="%s"%s xlink:href=%s/>\n' % (
+		__svg_number(x), __svg_number(y), size, quoteattr(path)))
+
+
+
+def ffp_svg(stream = None, compress = False):
+	"""This function returns the primitives of the SVG interface, which
+	writes each primitive to the stream as soon as it is drawn. Without
+	stream, the document is kept in memory and returned by the encode
+	primitive."""
+	return {
+		"canvas": partial(__svg_canvas, stream, compress),
+		"after": __svg_after,
+		"encode": partial(__svg_encode, compress),
+		"line": __svg_line,
+		"pie": __svg_pie,
+		"arc": __svg_arc,
+		"circle": __svg_circle,
+		"rectangle": __svg_rectangle,
+		"text": __svg_text,
+		"image": __svg_image,
+		"lines": __svg_lines,
+		"circles": __svg_circles,
+		"rectangles": __svg_rectangles
+	}
@@ -2,9 +2,12 @@
 # -*- coding: utf-8 -*-
 """This module provides an interface for the Tkinter library."""
 
+import numbers
 from math import sin, cos
 from Tkinter import Canvas, Tk, CENTER, E, W, PIESLICE, ARC, PhotoImage, NW
 
+from images import ImageCache
+
 __author__ = "José Antonio Riaza Valverde"
 __copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
 __credits__ = ["José Antonio Riaza Valverde"]
@@ -15,79 +18,168 @@ __status__ = "Development"
 
 
 
+class Items:
+	"""This class creates the items of a Tkinter canvas by chunks, with a
+	single Tcl evaluation for each chunk. When the canvas is drawn again,
+	the items of the previous draw are reconfigured instead of created, as
+	long as they are of the same type and in the same order. The images
+	are cached with the canvas, since they belong to its Tcl interpreter."""
+	
+	def __init__(self, canvas, chunk = 1024):
+		self.canvas = canvas
+		self.images = ImageCache()
+		self.path = str(canvas)
+		self.chunk = chunk
+		# Items [id, type] of the current draw, in stacking order
+		self.items = []
+		# Items of the previous draw that can be reused
+		self.pool = []
+		self.script = []
+		self.created = []
+		self.scheduled = False
+	
+	def add(self, kind, coords, options):
+		"""This method creates or reuses an item with the given coordinates
+		and options (name and value)."""
+		coords = " ".join(map(ffp_tcl, coords))
+		options = " ".join("-%s %s" % (name, value if name == "font" else ffp_tcl(value)) for name, value in options)
+		index = len(self.items)
+		if index < len(self.pool) and self.pool[index][1] == kind:
+			id = self.pool[index][0]
+			self.script.append("%s coords %s %s" % (self.path, id, coords))
+			self.script.append("%s itemconfigure %s %s" % (self.path, id, options))
+			self.items.append([id, kind])
+		else:
+			self.delete(self.pool[index:])
+			self.pool = self.pool[:index]
+			self.script.append("lappend ffp_items [%s create %s %s %s]" % (self.path, kind, coords, options))
+			self.created.append(index)
+			self.items.append([None, kind])
+		if len(self.script) >= self.chunk:
+			self.flush()
+		elif not self.scheduled:
+			# The items are shown when Tkinter is idle at the latest
+			self.scheduled = True
+			self.canvas.after_idle(self.flush)
+	
+	def delete(self, items):
+		"""This method deletes the given items."""
+		if items:
+			self.script.append("%s delete %s" % (self.path, " ".join(map(lambda x: str(x[0]), items))))
+	
+	def flush(self):
+		"""This method evaluates the pending commands."""
+		self.scheduled = False
+		if not self.script:
+			return
+		script = "set ffp_items {}\n" + "\n".join(self.script) + "\nset ffp_items"
+		self.script = []
+		if not isinstance(script, str):
+			script = script.encode("utf-8")
+		ids = self.canvas.tk.splitlist(self.canvas.tk.eval(script))
+		for index, id in zip(self.created, ids):
+			self.items[index][0] = id
+		self.created = []
+	
+	def reuse(self):
+		"""This method starts a new draw reusing the items of the canvas."""
+		self.finish()
+		self.pool, self.items = self.items, []
+	
+	def finish(self):
+		"""This method ends a draw, deleting the items not reused."""
+		self.delete(self.pool[len(self.items):])
+		self.pool = []
+		self.flush()
+
+
+
+def ffp_tcl(value):
+	"""This function returns a number or a string as a Tcl word."""
+	if isinstance(value, numbers.Integral):
+		return str(int(value))
+	if isinstance(value, numbers.Real):
+		return repr(float(value))
+	if value == "":
+		return "{}"
+	return "".join(map(lambda x: ffp_tcl_escapes.get(x, x), value))
+
+# This dictionary stores the escapes of the characters of Tcl words.
+ffp_tcl_escapes = dict([(x, "\\" + x) for x in "\\[]{}$;\" "] + [("\n", "\\n"), ("\t", "\\t"), ("\r", "\\r")])
+
+def __shape(background, border, width):
+	"""This function returns the options of the outline and fill of an item."""
+	return [
+		("fill", "" if background is None else background),
+		("outline", "black" if border is None else border),
+		("width", 1 if width is None else width)]
+
 def __tkinter_canvas(width, height):
 	"""This function creates a new Tkinter canvas."""
 	w = Canvas(Tk(), width = width, height = height)
 	w.pack()
+	w.ffp_items = Items(w)
 	return w
 
+def __tkinter_clear(plot):
+	"""This function starts a new draw in the Tkinter canvas, whose items
+	are reused."""
+	plot.canvas.ffp_items.reuse()
+
 def __tkinter_after(plot):
+	plot.canvas.ffp_items.finish()
 	plot.canvas.mainloop()
 
+def __tkinter_update(plot):
+	"""This function shows the items drawn and returns without blocking."""
+	plot.canvas.ffp_items.finish()
+	plot.canvas.update()
+
 def __tkinter_line(plot, x, y, fx, fy, border, width):
 	"""This function draws a line with the Tkinter library."""
-	plot.canvas.create_line(
-		x,
-		plot.height - y,
-		fx,
-		plot.height - fy,
-		fill = border,
-		width = width
-	)
+	plot.canvas.ffp_items.add("line",
+		(x, plot.height - y, fx, plot.height - fy), [
+		("fill", "black" if border is None else border),
+		("width", 1 if width is None else width)])
+
+def __tkinter_lines(plot, xs, ys, fxs, fys, border, width):
+	"""This function draws many lines sharing the same style with the Tkinter library."""
+	for x, y, fx, fy in zip(xs, ys, fxs, fys):
+		__tkinter_line(plot, x, y, fx, fy, border, width)
 
 def __tkinter_pie(plot, x, y, radius, alpha, beta, background, border, width):
 	"""This function draws a sector with the Tkinter library."""
-	plot.canvas.create_arc(
-		x - radius,
-		plot.height - (y - radius),
-		x + radius,
-		plot.height - (y + radius),
-		start = alpha,
-		extent = beta,
-		fill = background,
-		outline = border,
-		width = width,
-		style = PIESLICE
-	)
+	plot.canvas.ffp_items.add("arc",
+		(x - radius, plot.height - (y - radius), x + radius, plot.height - (y + radius)),
+		[("start", alpha), ("extent", beta), ("style", PIESLICE)] + plot.styles.pen(__shape, background, border, width))
 
 def __tkinter_arc(plot, x, y, radius, alpha, beta, background, border, width):
 	"""This function draws a sector with the Tkinter library."""
-	plot.canvas.create_arc(
-		x - radius,
-		plot.height - (y - radius),
-		x + radius,
-		plot.height - (y + radius),
-		start = alpha,
-		extent = beta,
-		fill = background,
-		outline = border,
-		width = width,
-		style = ARC
-	)
+	plot.canvas.ffp_items.add("arc",
+		(x - radius, plot.height - (y - radius), x + radius, plot.height - (y + radius)),
+		[("start", alpha), ("extent", beta), ("style", ARC)] + plot.styles.pen(__shape, background, border, width))
 
 def __tkinter_circle(plot, x, y, radius, background, border, width):
 	"""This function draws a circle with the Tkinter library."""
-	plot.canvas.create_oval(
-		x - radius,
-		plot.height - (y - radius),
-		x + radius,
-		plot.height - (y + radius),
-		fill = background,
-		outline = border,
-		width = width
-	)
+	plot.canvas.ffp_items.add("oval",
+		(x - radius, plot.height - (y - radius), x + radius, plot.height - (y + radius)),
+		plot.styles.pen(__shape, background, border, width))
+
+def __tkinter_circles(plot, xs, ys, radii, background, border, width):
+	"""This function draws many circles sharing the same style with the Tkinter library."""
+	for x, y, radius in zip(xs, ys, radii):
+		__tkinter_circle(plot, x, y, radius, background, border, width)
 
 def __tkinter_rectangle(plot, x, y, dx, dy, background, border, width):
 	"""This function draws a rectangle with the Tkinter library."""
-	plot.canvas.create_rectangle(
-		x,
-		plot.height - y,
-		x + dx,
-		plot.height - (y + dy),
-		fill = background,
-		outline = border,
-		width = width
-	)
+	plot.canvas.ffp_items.add("rectangle",
+		(x, plot.height - y, x + dx, plot.height - (y + dy)),
+		plot.styles.pen(__shape, background, border, width))
+
+def __tkinter_rectangles(plot, xs, ys, dxs, dys, background, border, width):
+	"""This function draws many rectangles sharing the same style with the Tkinter library."""
+	for x, y, dx, dy in zip(xs, ys, dxs, dys):
+		__tkinter_rectangle(plot, x, y, dx, dy, background, border, width)
 
 def __tkinter_text(plot, x, y, text, family, size, color, align):
 	"""This function draws a text with the Tkinter library."""
@@ -97,32 +189,43 @@ def __tkinter_text(plot, x, y, text, family, size, color, align):
 		anchor = E
 	else:
 		anchor = CENTER
-	plot.canvas.create_text(
-		x,
-		plot.height - y,
-		text = text,
-		font = (family, size),
-		fill = color,
-		anchor = anchor
-	)
+	plot.canvas.ffp_items.add("text", (x, plot.height - y), [
+		("text", text if isinstance(text, basestring) else str(text)),
+		("font", "[list %s %s]" % (ffp_tcl(family), ffp_tcl(size))),
+		("fill", color),
+		("anchor", anchor)])
 
 def __tkinter_image(plot, x, y, path):
-	"""This function draws an image with the Tkinter library."""
-	img = PhotoImage(file = path)
+	"""This function draws an image with the Tkinter library. The images
+	are cached for each canvas, since they cannot be shared between Tcl
+	interpreters."""
+	def decode(path):
+		image = PhotoImage(master = plot.canvas, file = path)
+		return image, image.width() * image.height() * 4
+	img = plot.canvas.ffp_items.images.get(path, decode)
 	plot.push_image(img)
-	plot.canvas.create_image(x, y, image=img, anchor=NW)
+	plot.canvas.ffp_items.add("image", (x, y), [("image", str(img)), ("anchor", NW)])
 
 
 
 # This dictionary stores all the primitives of the Tkinter library.
 ffp_tkinter = {
 	"canvas": __tkinter_canvas,
+	"clear": __tkinter_clear,
 	"after": __tkinter_after,
+	"update": __tkinter_update,
 	"line": __tkinter_line,
 	"pie": __tkinter_pie,
 	"arc": __tkinter_arc,
 	"circle": __tkinter_circle,
 	"rectangle": __tkinter_rectangle,
 	"text": __tkinter_text,
-	"image": __tkinter_image
+	"image": __tkinter_image,
+	"lines": __tkinter_lines,
+	"circles": __tkinter_circles,
+	"rectangles": __tkinter_rectangles
 }
+
+# This dictionary stores the primitives of the Tkinter library that return
+# the live canvas after drawing instead of running the main loop.
+ffp_tkinter_live = dict(ffp_tkinter, after = __tkinter_update)
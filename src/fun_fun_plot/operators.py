@@ -19,45 +19,59 @@ __status__ = "Development"
 def Call(func):
 	"""This function returns a function operator."""
 	return lambda *args: Operator(lambda plot, data, elem, offset:
-		func(*list(map(lambda x: ffp_eval(x, plot, data, elem, offset), args))))
+		func(*list(map(lambda x: ffp_eval(x, plot, data, elem, offset), args))),
+		"{0}(" + ", ".join(map(lambda i: "{%d}" % i, range(1, len(args)+1))) + ")",
+		[func] + list(args), ["call"])
 
 
 
 # ACCESSING PLOT INFORMATION
 
 # These operators return width and height of the plot
-Width = Operator(lambda plot, data, elem, offset: plot.get_width(offset))
-Height = Operator(lambda plot, data, elem, offset: plot.get_height(offset))
+Width = Operator(lambda plot, data, elem, offset: plot.get_width(offset),
+	"plot.get_width(offset)", flags = ["layout"])
+Height = Operator(lambda plot, data, elem, offset: plot.get_height(offset),
+	"plot.get_height(offset)", flags = ["layout"])
 
 # These operators return dimensions of the plot
-Left = Operator(lambda plot, data, elem, offset: plot.get_left())
-Right = Operator(lambda plot, data, elem, offset: plot.get_right())
-Top = Operator(lambda plot, data, elem, offset: plot.get_top())
-Bot = Operator(lambda plot, data, elem, offset: plot.get_bottom())
+Left = Operator(lambda plot, data, elem, offset: plot.get_left(),
+	"plot.get_left()", flags = ["layout"])
+Right = Operator(lambda plot, data, elem, offset: plot.get_right(),
+	"plot.get_right()", flags = ["layout"])
+Top = Operator(lambda plot, data, elem, offset: plot.get_top(),
+	"plot.get_top()", flags = ["layout"])
+Bot = Operator(lambda plot, data, elem, offset: plot.get_bottom(),
+	"plot.get_bottom()", flags = ["layout"])
 
 
 
 # ACCESSING DATA
 
 # This operator returns the current index of the data
-Index = Operator(lambda plot, data, elem, offset: float(elem))
+Index = Operator(lambda plot, data, elem, offset: float(elem),
+	"float(elem)", flags = ["row"], vector = "data.index()")
 
 # This operator returns the current value of the data
-Value = Operator(lambda plot, data, elem, offset: data[elem])
+Value = Operator(lambda plot, data, elem, offset: data[elem],
+	"data[elem]", flags = ["row"], vector = "data.value()")
 
 # This operator returns the n-th value of the attribute
-Attr = lambda n: Operator(lambda plot, data, elem, offset: data[elem][ffp_eval(n, plot, data, elem, offset)])
+Attr = lambda n: Operator(lambda plot, data, elem, offset: data[elem][ffp_eval(n, plot, data, elem, offset)],
+	"data[elem][{0}]", [n], ["row"], "data.column({0})")
 
 # This operator returns the n-th column of the dataset
-Column = lambda n: Operator(lambda plot, data, elem, offset:(lambda _n: list(map(lambda x: x[_n], data)))(ffp_eval(n, plot, data, elem, offset)))
+Column = lambda n: Operator(lambda plot, data, elem, offset:(lambda _n: list(map(lambda x: x[_n], data)))(ffp_eval(n, plot, data, elem, offset)),
+	"(lambda _n: [_row[_n] for _row in data])({0})", [n], ["data"], "data.column({0})")
 
 # This operator returns the length of the data
-DataLen = Operator(lambda plot, data, elem, offset: float(len(data)))
+DataLen = Operator(lambda plot, data, elem, offset: float(len(data)),
+	"float(len(data))", flags = ["data"])
 
 # This operator returns the value of the key data
 Get = lambda key, default = None: Operator(lambda plot, data, elem, offset:
 	plot.get_data(ffp_eval(key, plot, data, elem, offset),
-	ffp_eval(default, plot, data, elem, offset)))
+	ffp_eval(default, plot, data, elem, offset)),
+	"plot.get_data({0}, {1})", [key, default], ["state"], "plot.get_columns({0}, {1})")
 
 
 
@@ -73,7 +87,8 @@ Normal = lambda data, dataset: (data - Call(min)(dataset)) / (Call(max)(dataset)
 # COLORS
 
 # Assign color to a class
-ClassColor = lambda classname: Operator(lambda plot, data, elem, offset: plot.class_color(ffp_eval(classname, plot, data, elem, offset)))
+ClassColor = lambda classname: Operator(lambda plot, data, elem, offset: plot.class_color(ffp_eval(classname, plot, data, elem, offset)),
+	"plot.class_color({0})", [classname], ["palette"], "plot.class_colors({0})")
 
 
 
@@ -81,9 +96,12 @@ ClassColor = lambda classname: Operator(lambda plot, data, elem, offset: plot.cl
 
 # This operator returns a range
 def Range(n, start, incr):
-	def _range(n, start, incr):
-		return list(map(lambda i: start+incr*i, range(int(n))))
-	return Operator(lambda plot, data, elem, offset: _range(
+	return Operator(lambda plot, data, elem, offset: ffp_range(
 		ffp_eval(n, plot, data, elem, offset),
 		ffp_eval(start, plot, data, elem, offset),
-		ffp_eval(incr, plot, data, elem, offset)))
+		ffp_eval(incr, plot, data, elem, offset)),
+		"{0}({1}, {2}, {3})", [ffp_range, n, start, incr])
+
+def ffp_range(n, start, incr):
+	"""This function returns n values from start with increment incr."""
+	return list(map(lambda i: start+incr*i, range(int(n))))
@@ -2,7 +2,13 @@
 # -*- coding: utf-8 -*-
 """This module provides primitive classes for plotting."""
 
+import numbers
+import weakref
+from contextlib import contextmanager
 
+from datasets import Columns, Rows, Stream, Styles, Sweep, ffp_array, ffp_bounds, ffp_decimated_rows, ffp_encode, ffp_is_array, ffp_lengths, ffp_map, ffp_rows, ffp_runs, ffp_vectorize, ffp_where
+from profiling import Profile
+from spatial import Grid
 
 __author__ = "José Antonio Riaza Valverde"
 __copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
@@ -14,22 +20,201 @@ __status__ = "Development"
 
 
 
-def ffp_eval(obj, plot, data, elem, offset):
+def ffp_eval(obj, plot, data, elem, offset, previous = None):
 	"""This functions gets the value of any object."""
-	if isinstance(obj, Element) or isinstance(obj, Operator):
+	if isinstance(obj, Element):
+		if plot.profile is not None:
+			return plot.profile.call("eval", obj.__class__.__name__, obj.eval, plot, data, elem, offset, previous)
+		return obj.eval(plot, data, elem, offset, previous)
+	elif isinstance(obj, Operator):
 		return obj.eval(plot, data, elem, offset)
 	else:
 		return obj
 
+def ffp_eval_columns(obj, plot, data, offset, previous = None):
+	"""This functions gets the value of any object over a columnar dataset."""
+	if isinstance(obj, Element):
+		if plot.profile is not None:
+			return plot.profile.call("eval", obj.__class__.__name__, obj.eval_columns, plot, data, offset, previous)
+		return obj.eval_columns(plot, data, offset, previous)
+	elif isinstance(obj, Operator):
+		return obj.eval_columns(plot, data, offset)
+	else:
+		return obj
+
+def ffp_draw(plot, shapes):
+	"""This function draws a sequence of graphical components, grouping the
+	consecutive ones of the same type and style in a single call to the
+	batched primitive of the interface, when it provides one."""
+	batch, key = [], None
+	for shape in shapes:
+		if not ffp_visible(shape.get_box(), plot.viewport):
+			plot.culled += 1
+			continue
+		name = shape.batch if shape.batch in plot.primitives else None
+		style = shape.get_style() if name is not None else None
+		if batch and (name, style) != key:
+			ffp_draw_batch(plot, key, batch)
+			batch = []
+		if name is None:
+			shape.draw(plot)
+		else:
+			batch.append(shape.get_geometry())
+			key = (name, style)
+	if batch:
+		ffp_draw_batch(plot, key, batch)
+
+def ffp_draw_batch(plot, key, batch):
+	"""This function calls a batched primitive with the lists of geometric
+	attributes of the shapes and their common style."""
+	name, style = key
+	plot.primitives[name](plot, *(list(map(list, zip(*batch))) + list(style)))
+
+def ffp_decimate(shapes):
+	"""This function returns the shapes to draw at pixel resolution: of the
+	shapes of the same type and style covering the same pixels, only the
+	last one drawn is kept, since it hides the others."""
+	last = dict([])
+	for index, shape in enumerate(shapes):
+		last[shape.get_bin()] = (index, shape)
+	return list(map(lambda x: x[1], sorted(last.values(), key = lambda x: x[0])))
+
+def ffp_pixel(value):
+	"""This function rounds a coordinate to pixel resolution."""
+	return round(value) if isinstance(value, numbers.Number) else value
+
+def ffp_visible(box, viewport):
+	"""This function checks if a bounding box (left, bottom, right, top)
+	intersects the viewport, for single values or arrays. An unknown box
+	(None) is always visible."""
+	if box is None:
+		return True
+	left, bottom, right, top = box
+	vleft, vbottom, vright, vtop = viewport
+	return (left <= vright) & (right >= vleft) & (bottom <= vtop) & (top >= vbottom)
+
+def ffp_domain(domain, default):
+	"""This function completes a domain (left, right, top, bottom) with
+	the values of another domain where they are unknown (None)."""
+	if domain is None:
+		return default
+	return tuple(map(lambda x, y: y if x is None else x, domain, default))
+
+def ffp_state(obj, events = None):
+	"""This function returns the keys of the plot data read ("get") and
+	stored ("store") by any object, in the order they are evaluated for
+	each row. The keys that are not constant are None."""
+	events = [] if events is None else events
+	if isinstance(obj, Element):
+		for x in obj.get_attributes():
+			ffp_state(x, events)
+	elif isinstance(obj, Operator):
+		for x in obj.operands:
+			ffp_state(x, events)
+		if "state" in obj.flags:
+			events.append(("get", ffp_key(obj.operands[0])))
+		if "store" in obj.flags:
+			events.append(("store", ffp_key(obj.operands[1])))
+	return events
+
+def ffp_key(obj):
+	"""This function returns a key of the plot data if it is constant."""
+	return None if isinstance(obj, Operator) or isinstance(obj, Element) else obj
+
+def ffp_accumulators(events):
+	"""This function returns the keys read before being stored in a row,
+	whose values are carried from row to row, and the keys stored once in
+	a row. Temporaries, stored before being read, are in neither set."""
+	accumulators, stored, once = set(), set(), set()
+	for event, key in events:
+		if event == "get" and key not in stored:
+			accumulators.add(key)
+		elif event == "store" and key in stored:
+			once.discard(key)
+		elif event == "store":
+			stored.add(key)
+			once.add(key)
+	return accumulators & stored, once
+
+def ffp_compile(obj):
+	"""This function returns an equivalent compiled version of any object."""
+	if isinstance(obj, Element) or isinstance(obj, Operator):
+		return obj.compile()
+	else:
+		return obj
+
+def ffp_function(obj, columnar = False, memo = True):
+	"""This function returns a generated function that evaluates an operator."""
+	namespace = dict([])
+	source = "lambda plot, data, elem, offset: " + ffp_source(obj, namespace, columnar, memo)
+	return eval(source, namespace)
+
+def ffp_source(obj, namespace, columnar = False, memo = True):
+	"""This function returns the Python source code of any object,
+	binding the values it needs in the namespace. The columnar source
+	evaluates the object over whole columns of a columnar dataset.
+	Subexpressions reading the whole dataset but not the current row
+	are memoized in the plot, so they are computed once per pass."""
+	if isinstance(obj, Operator) and obj.template is not None and not obj.get_flags():
+		obj = obj.eval(None, None, None, None)
+	if isinstance(obj, Operator) and memo and not columnar and ffp_is_aggregate(obj):
+		return "plot.memo(%s, offset, %s, data)" % (
+			ffp_bind(obj, namespace), ffp_bind(ffp_function(obj, False, False), namespace))
+	if isinstance(obj, Operator):
+		if obj.template is None and columnar:
+			return "%s(%s, plot, data, offset)" % (
+				ffp_bind(ffp_rows, namespace), ffp_bind(obj.operation, namespace))
+		if obj.template is None:
+			return "%s(plot, data, elem, offset)" % ffp_bind(obj.operation, namespace)
+		if columnar and "call" in obj.flags:
+			return ffp_call_source(obj, namespace, memo)
+		template = obj.vector if columnar and obj.vector is not None else obj.template
+		return template.format(*list(map(
+			lambda x: ffp_source(x, namespace, columnar, memo), obj.operands)))
+	return ffp_bind(obj, namespace)
+
+def ffp_call_source(operator, namespace, memo = True):
+	"""This function returns the columnar source of a function call. The
+	functions with a NumPy equivalent are called once over whole columns,
+	and the other ones once per row, unless their arguments read only
+	whole columns."""
+	function, args = operator.operands[0], operator.operands[1:]
+	sources = list(map(lambda x: ffp_source(x, namespace, True, memo), args))
+	aggregate = ffp_is_aggregate(operator)
+	vectorized = ffp_vectorize(function, len(args), aggregate)
+	if vectorized is not None or aggregate:
+		function = function if vectorized is None else vectorized
+		return "%s(%s)" % (ffp_bind(function, namespace), ", ".join(sources))
+	rows = list(map(lambda x: isinstance(x, Operator) and
+		bool(x.get_flags() & set(["row", "state", "store", "opaque"])), args))
+	return "%s(%s)" % (ffp_bind(ffp_map, namespace), ", ".join([ffp_bind(function, namespace),
+		ffp_bind(rows, namespace), "len(data)"] + sources))
+
+def ffp_is_aggregate(operator):
+	"""This function checks if an operator reads the whole dataset
+	without depending on the current row or the plot state."""
+	flags = operator.get_flags()
+	return "data" in flags and not flags & set(["row", "state", "store", "opaque"])
+
+def ffp_bind(value, namespace):
+	"""This function binds a value in the namespace and returns its name."""
+	name = "_k%d" % len(namespace)
+	namespace[name] = value
+	return name
+
 
 
 class Plot:
-	"""This class stores a canvas for drawing."""
+	"""This class stores a canvas for drawing. The dimensions of the plot
+	declared in its domain (left, right, top, bottom) or in the domains of
+	its axis are not computed from the dataset, and when all of them are
+	declared the dataset is evaluated only once."""
 	
-	def __init__(self, component, primitives, width = 200, height = 200, data = None):
+	def __init__(self, component, primitives, width = 200, height = 200, data = None, domain = None):
 		self.component = component
 		self.primitives = primitives
 		self.computed = False
+		self.compiled = False
 		self.colors = dict([])
 		self.data = dict([]) if data is None else data
 		self.palette = ["red", "green", "blue", "yellow", "orange", "pink"]
@@ -37,31 +222,182 @@ class Plot:
 		self.width = width
 		self.height = height
 		self.images = []
+		self.cache = dict([])
+		self.domain = domain
+		self.sweep = None
+		self.dataset = None
+		self.scenes = []
+		self.index = None
+		# Area of the canvas (left, bottom, right, top) outside of which
+		# the graphical components are not drawn, and how many were not
+		self.viewport = (0, 0, width, height)
+		self.culled = 0
+		self.styles = Styles()
+		# Index of the first row evaluated by the data components
+		self.start = 0
+		# Profile of the draws, or None when they are not measured, and the
+		# plots drawn in the profiling context, which are measured too
+		self.profile = None
+		self.profiled = None
 		# (left, right, top, bottom)
 		self.dimensions = (float('inf'), float('-inf'), float('-inf'), float('inf'))
 	
 	def copy(self):
 		"""This method returns a new instance of the plot."""
-		return Plot(self.component, self.primitives, self.width, self.height, self.data)
+		plot = Plot(self.component, self.primitives, self.width, self.height, self.data, self.domain)
+		plot.palette = self.palette
+		plot.profile = self.profile
+		if self.profiled is not None:
+			plot.profiled = self.profiled
+			self.profiled.add(plot)
+		return plot
+	
+	def compile(self):
+		"""This method compiles the operators of the component."""
+		self.component = ffp_compile(self.component)
+		self.compiled = True
+		return self
 	
 	def draw(self, data):
 		"""This method plots a dataset."""
 		if self.computed:
 			return self
-		length = len(data)
+		if not self.compiled:
+			self.phase("compile", self.compile)
 		plot = self.copy()
+		plot.render(data)
+		plot.phase("after", plot.primitives["after"], plot)
+		return plot
+	
+	def phase(self, name, function, *args):
+		"""This method calls a function that runs a phase of the draw,
+		measuring its time when the plot is profiled."""
+		if self.profile is None:
+			return function(*args)
+		return self.profile.call("phase", name, function, *args)
+	
+	@contextmanager
+	def profiling(self, profile = None):
+		"""This method returns a context in which the draws of the plot (and
+		of its sessions) are measured by the given profile, or by a new one,
+		which is the value of the context. The primitives of the interface
+		are measured too. When the context ends, the plots drawn in it are
+		no longer measured, so appending to them later is not measured."""
+		profile = Profile() if profile is None else profile
+		primitives = self.primitives
+		self.profile, self.primitives = profile, profile.wrap(primitives)
+		self.profiled = weakref.WeakSet()
+		try:
+			yield profile
+		finally:
+			for plot in [self] + list(self.profiled):
+				plot.profile, plot.primitives, plot.profiled = None, primitives, None
+	
+	def render(self, data, canvas = None):
+		"""This method computes and draws a dataset in this instance of the
+		plot, clearing the given canvas instead of creating a new one when
+		the interface provides the clear primitive."""
+		length = None if isinstance(data, Stream) else len(data)
+		self.dataset = data
+		self.scenes = []
+		self.index = None
+		self.viewport = (0, 0, self.width, self.height)
+		self.culled = 0
+		self.styles = Styles()
 		# Compute data
-		ffp_eval(plot.component, plot, data, length, (0,0,0,0)).compute(plot)
-		plot.computed = True
+		domain = self.get_domain()
+		bounds = None
+		if None in domain:
+			bounds = self.phase("bounds", ffp_eval, self.component, self, data, length, (0,0,0,0))
+			self.phase("compute", bounds.compute, self)
+		self.dimensions = ffp_domain(domain, self.dimensions)
+		self.computed = True
 		# Create canvas
-		plot.canvas = plot.primitives["canvas"](plot.width, plot.height)
+		if canvas is not None and "clear" in self.primitives:
+			self.canvas = canvas
+			self.phase("canvas", self.primitives["clear"], self)
+		else:
+			self.canvas = self.phase("canvas", self.primitives["canvas"], self.width, self.height)
 		# Draw data
-		ffp_eval(plot.component, plot, data, length, (0,0,0,0)).draw(plot)
-		self.primitives["after"](plot)
-		return plot
+		component = self.phase("eval", ffp_eval, self.component, self, data, length, (0,0,0,0), bounds)
+		self.phase("draw", component.draw, self)
+	
+	def append(self, rows):
+		"""This method adds rows to the dataset of a drawn plot. Only the new
+		rows are evaluated and drawn, unless the dimensions of the plot change
+		or the plot depends on the whole dataset or on its state, in which
+		case the whole dataset is drawn again. The interface must provide
+		the clear primitive, since its canvas is drawn after being ended."""
+		if not self.computed:
+			raise ValueError("only a drawn plot can be appended")
+		if "clear" not in self.primitives:
+			raise TypeError("the interface does not provide the clear primitive")
+		if isinstance(self.dataset, Columns) or isinstance(self.dataset, Stream):
+			raise TypeError("only a dataset of rows can be appended")
+		data = list(self.dataset) + list(rows)
+		self.start, self.dataset = len(self.dataset), data
+		dimensions = self.dimensions
+		if not self.component.get_flags() & set(["data", "state", "store", "opaque"]):
+			domain = self.get_domain()
+			bounds = None
+			if None in domain:
+				self.computed = False
+				bounds = ffp_eval(self.component, self, data, len(data), (0,0,0,0))
+				bounds.compute(self)
+				self.computed = True
+			self.dimensions = ffp_domain(domain, self.dimensions)
+			if self.dimensions == dimensions:
+				ffp_eval(self.component, self, data, len(data), (0,0,0,0), bounds).draw_rows(self)
+				self.start = 0
+				return self.finish()
+		self.start = 0
+		self.computed = False
+		self.cache = dict([])
+		self.dimensions = (float('inf'), float('-inf'), float('-inf'), float('inf'))
+		self.render(data, self.canvas)
+		return self.finish()
+	
+	def finish(self):
+		"""This method ends a draw not followed by the after primitive (which
+		may block), with the update primitive of the interface if any."""
+		if "update" in self.primitives:
+			self.phase("update", self.primitives["update"], self)
+		return self
+	
+	def pick(self, x, y):
+		"""This method returns the index of the row of the dataset drawn on
+		top at the point (x, y) of the canvas, or None. The first call builds
+		a spatial index of the bounding boxes of the drawn rows, clipped to
+		the viewport in effect when they were drawn."""
+		if self.index is None:
+			self.index = Grid(self.width, self.height)
+			for start, viewport, scene in self.scenes:
+				if isinstance(scene, Vector):
+					elements = (scene.component.row(index) for index in range(scene.length))
+				else:
+					elements = scene.operator
+				for index, element in enumerate(elements):
+					for shape in element.shapes():
+						box = shape.get_box()
+						if box is not None:
+							self.index.insert(box, start + index, viewport)
+		rows = self.index.query(x, self.height - y)
+		return rows[-1] if rows else None
+	
+	def session(self):
+		"""This method returns a session for drawing many datasets with this plot."""
+		return Session(self)
+	
+	def get_domain(self):
+		"""This method returns the declared domain of the plot."""
+		return ffp_domain(self.domain, self.component.get_domain())
 	
 	def set_max_dimensions(self, min_x, min_y, max_x, max_y):
 		"""This method updates the maximum and minimum values."""
+		if ffp_is_array(min_x) or ffp_is_array(max_x):
+			min_x, max_x = ffp_bounds(min_x, max_x)
+		if ffp_is_array(min_y) or ffp_is_array(max_y):
+			min_y, max_y = ffp_bounds(min_y, max_y)
 		if min_x > max_x:
 			min_x, max_x = max_x, min_x
 		if min_y > max_y:
@@ -108,12 +444,28 @@ class Plot:
 			return self.dimensions[3]
 		return 0
 	
+	def memo(self, operator, offset, function, data):
+		"""This method returns the value of a row-independent operator,
+		computing it only once per pass of the draw."""
+		key = (operator, offset, self.computed)
+		if key not in self.cache:
+			self.cache[key] = function(self, data, None, offset)
+		return self.cache[key]
+	
 	def class_color(self, classname):
 		"""This method assigns and returns colors for classes."""
 		if self.colors.get(classname) is None:
 			self.colors[classname] = self.palette[len(self.colors) % len(self.palette)]
 		return self.colors[classname]
 	
+	def class_colors(self, classnames):
+		"""This method assigns and returns colors for an array of classes."""
+		try:
+			names, codes = ffp_encode(classnames)
+		except TypeError:
+			return ffp_array(list(map(self.class_color, classnames)))
+		return ffp_array(list(map(self.class_color, names)))[codes]
+	
 	def store_data(self, key, value):
 		"""This method stores the (key,value) data."""
 		self.data[key] = value
@@ -123,18 +475,72 @@ class Plot:
 		"""This method returns the data for the given key."""
 		return self.data.get(key, default)
 	
+	def store_columns(self, key, value):
+		"""This method stores the (key,value) data for all the rows of a columnar dataset."""
+		if self.sweep is None:
+			return self.store_data(key, value)
+		return self.sweep.store(key, value)
+	
+	def get_columns(self, key, default):
+		"""This method returns the data for the given key for all the rows of a columnar dataset."""
+		if self.sweep is None:
+			return self.get_data(key, default)
+		return self.sweep.get(key, default)
+	
+	def accumulate_columns(self, key, value, default):
+		"""This method adds the value to the data for the given key for all the rows of a columnar dataset."""
+		if self.sweep is None:
+			return self.store_data(key, self.get_data(key, default) + value)
+		return self.sweep.accumulate(key, value, default)
+	
 	def push_image(self, image):
 		"""This method stores an image."""
 		self.images.append(image)
 
 
 
+class Session:
+	"""This class draws many datasets with the same plot. The component is
+	compiled once and the canvas of the interface is reused between draws,
+	while the colors of the classes and the stored data are reset for
+	each dataset."""
+	
+	def __init__(self, plot):
+		if not plot.compiled:
+			plot.compile()
+		self.plot = plot
+		self.data = dict(plot.data)
+		self.canvas = None
+	
+	def draw(self, data):
+		"""This method plots a dataset. When the canvas is reused, the
+		returned plot is only valid until the next draw."""
+		plot = self.plot.copy()
+		plot.data = dict(self.data)
+		plot.render(data, self.canvas)
+		self.canvas = plot.canvas
+		plot.phase("after", plot.primitives["after"], plot)
+		return plot
+
+
+
 class Element:
 	"""This class defines the interface for any graphical component."""
 	
 	# This attribute stores the initial offsets (left, right, top, bottom)
 	offset = (0, 0, 0, 0)
 	
+	# This attribute stores the indices of the attributes needed to compute
+	# the dimensions of the plot (None for all of them)
+	bounds = None
+	
+	# This attribute stores the evaluation plan of the attributes
+	plan = None
+	
+	# This attribute stores the name of the batched primitive that draws
+	# many instances of the graphical component in a single call
+	batch = None
+	
 	def get_offset_left(self):
 		"""This method returns the left offset."""
 		return self.offset[0]
@@ -155,6 +561,23 @@ class Element:
 		"""This method returns all the parameters of the constructor."""
 		return []
 	
+	def get_domain(self):
+		"""This method returns the domain declared by the graphical component."""
+		return (None, None, None, None)
+	
+	def get_box(self):
+		"""This method returns the bounding box (left, bottom, right, top) of
+		the graphical component in the canvas, or None if it is unknown."""
+		return None
+	
+	def get_flags(self):
+		"""This method returns the flags of the operators of the graphical component."""
+		flags = set()
+		for x in self.get_attributes():
+			if isinstance(x, Element) or isinstance(x, Operator):
+				flags.update(x.get_flags())
+		return flags
+	
 	def compute(self, plot):
 		"""This method computes some properties of the graphical component."""
 		pass
@@ -163,11 +586,101 @@ class Element:
 		"""This method draws the graphical component in the canvas."""
 		pass
 	
-	def eval(self, plot, data, elem, offset = (0,0,0,0)):
+	def draw_rows(self, plot):
+		"""This method draws only the data components inside the graphical component."""
+		for x in self.get_attributes():
+			if isinstance(x, Element):
+				x.draw_rows(plot)
+	
+	def shapes(self):
+		"""This method iterates over the graphical components in drawing order."""
+		yield self
+	
+	def draw_columns(self, plot, length):
+		"""This method draws the graphical component evaluated over a columnar
+		dataset with the batched primitive, one call for each run of rows
+		sharing the same style. The rows outside the viewport are dropped."""
+		visible = ffp_visible(self.get_box(), plot.viewport)
+		if ffp_is_array(visible):
+			rows = visible.nonzero()[0]
+			if len(rows) < length:
+				plot.culled += length - len(rows)
+				if len(rows) > 0:
+					self.row(rows).draw_columns(plot, len(rows))
+				return
+		elif not visible:
+			plot.culled += length
+			return
+		geometry = list(map(lambda x: x if ffp_is_array(x) else [x] * length, self.get_geometry()))
+		style = self.get_style()
+		start = 0
+		for end in ffp_runs(style, length):
+			if end == start:
+				continue
+			plot.primitives[self.batch](plot,
+				*(list(map(lambda x: x[start:end], geometry)) +
+				list(map(lambda x: x[start] if ffp_is_array(x) else x, style))))
+			start = end
+	
+	def get_bin(self):
+		"""This method returns a key shared by the graphical components of
+		the same type and style that cover the same pixels."""
+		if self.batch is None:
+			return self
+		return (self.__class__, tuple(map(ffp_pixel, self.get_geometry())), self.get_style())
+	
+	def get_plan(self):
+		"""This method returns, for each attribute, whether it is evaluated
+		before computing the dimensions of the plot, and whether it is
+		evaluated again (instead of reused) when drawing the plot."""
+		if self.plan is None:
+			bounds, draw = [], []
+			for index, x in enumerate(self.get_attributes()):
+				element = isinstance(x, Element)
+				flags = x.get_flags() if isinstance(x, Operator) else set()
+				bounds.append(element or self.bounds is None or index in self.bounds or
+					bool(flags & set(["store", "opaque"])))
+				draw.append(element or not bounds[-1] or
+					bool(flags & set(["layout", "state", "store", "opaque"])))
+			self.plan = (bounds, draw)
+		return self.plan
+	
+	def eval_attributes(self, plot, previous, evaluate):
+		"""This method evaluates the attributes of the graphical component.
+		Before the dimensions of the plot are computed, only the attributes
+		needed by compute are evaluated. After that, the attributes of the
+		previous instance that do not depend on the dimensions are reused."""
+		attributes = self.get_attributes()
+		bounds, draw = self.get_plan()
+		if not plot.computed:
+			return [evaluate(x, None) if b else None for x, b in zip(attributes, bounds)]
+		if previous is None:
+			return [evaluate(x, None) for x in attributes]
+		return [evaluate(x, p) if d else p for x, p, d in zip(attributes, previous.get_attributes(), draw)]
+	
+	def eval(self, plot, data, elem, offset = (0,0,0,0), previous = None):
 		"""This method returns an evaluated instance of the graphical component."""
-		return self.__class__(
-			*list(map(lambda x: ffp_eval(x, plot, data, elem, offset) if x is not None else None,
+		return self.__class__(*self.eval_attributes(plot, previous,
+			lambda x, p: ffp_eval(x, plot, data, elem, offset, p)))
+	
+	def eval_columns(self, plot, data, offset = (0,0,0,0), previous = None):
+		"""This method returns an instance of the graphical component evaluated
+		over a whole columnar dataset, whose attributes may be arrays."""
+		return self.__class__(*self.eval_attributes(plot, previous,
+			lambda x, p: ffp_eval_columns(x, plot, data, offset, p)))
+	
+	def row(self, index):
+		"""This method returns the instance of the graphical component for
+		the given row of an evaluation over a columnar dataset."""
+		element = self.__class__(
+			*list(map(lambda x: x[index] if ffp_is_array(x) else x,
 				self.get_attributes())))
+		element.offset = self.offset
+		return element
+	
+	def compile(self):
+		"""This method returns an instance of the graphical component with compiled attributes."""
+		return self.__class__(*list(map(ffp_compile, self.get_attributes())))
 	
 	def __add__(self, elem):
 		"""This method sequentially joins two graphical components."""
@@ -176,21 +689,76 @@ class Element:
 
 
 class Operator:
-	"""This class represents operations between data."""
+	"""This class represents operations between data.
 	
-	def __init__(self, operation):
+	The template is the Python source of the operation, where {0}, {1}, ...
+	stand for the source of the operands, and the flags name what the
+	operation reads or writes ("layout", "row", "data", "state", "store",
+	"palette") or whether it calls a function ("call"), which may not return
+	the same value each time. Operations without template are opaque for the
+	compiler."""
+	
+	def __init__(self, operation, template = None, operands = (), flags = (), vector = None):
 		self.operation = operation
+		self.template = template
+		self.operands = list(operands)
+		self.flags = frozenset(flags)
+		self.vector = vector
+		self.columnar = None
 	
 	def eval(self, plot, data, elem, offset):
 		"""This method evaluates the operation."""
 		return self.operation(plot, data, elem, offset)
-		
+	
+	def eval_columns(self, plot, data, offset):
+		"""This method evaluates the operation over a columnar dataset."""
+		if self.columnar is None:
+			self.columnar = ffp_function(self, True)
+		return self.columnar(plot, data, None, offset)
+	
+	def get_flags(self):
+		"""This method returns the flags of the operation and all its operands."""
+		flags = set(self.flags)
+		if self.template is None:
+			flags.add("opaque")
+		for operand in self.operands:
+			if isinstance(operand, Operator):
+				flags.update(operand.get_flags())
+		return flags
+	
+	def compile(self):
+		"""This method returns an equivalent operator evaluated by a single
+		generated function, folding the constant subexpressions that do not
+		call functions."""
+		if self.template is None:
+			return self
+		if not self.get_flags():
+			return self.eval(None, None, None, None)
+		return Operator(ffp_function(self), self.template, self.operands, self.flags, self.vector)
+	
+	def __getstate__(self):
+		"""This method returns the state of the operator for pickling,
+		leaving out the function of the operations with template."""
+		state = dict(self.__dict__)
+		state["columnar"] = None
+		if self.template is not None:
+			state["operation"] = None
+		return state
+	
+	def __setstate__(self, state):
+		"""This method restores a pickled operator, generating again
+		the function of the operation from its template."""
+		self.__dict__.update(state)
+		if self.operation is None:
+			self.operation = ffp_function(self)
+
 	def __add__(self, operator):
 		"""This method adds two operations."""
 		return Operator(
 			lambda plot, data, elem, offset:
 				ffp_eval(self, plot, data, elem, offset) +
-				ffp_eval(operator, plot, data, elem, offset))
+				ffp_eval(operator, plot, data, elem, offset),
+			"({0} + {1})", [self, operator])
 	
 	def __radd__(self, operator):
 		"""This method adds two operations."""
@@ -201,7 +769,8 @@ class Operator:
 		return Operator(
 			lambda plot, data, elem, offset:
 				ffp_eval(self, plot, data, elem, offset) -
-				ffp_eval(operator, plot, data, elem, offset))
+				ffp_eval(operator, plot, data, elem, offset),
+			"({0} - {1})", [self, operator])
 	
 	def __rsub__(self, operator):
 		"""This method substracts two operations."""
@@ -212,7 +781,8 @@ class Operator:
 		return Operator(
 			lambda plot, data, elem, offset:
 				ffp_eval(self, plot, data, elem, offset) *
-				ffp_eval(operator, plot, data, elem, offset))
+				ffp_eval(operator, plot, data, elem, offset),
+			"({0} * {1})", [self, operator])
 	
 	def __rmul__(self, operator):
 		"""This method multiplies two operations."""
@@ -223,7 +793,8 @@ class Operator:
 		return Operator(
 			lambda plot, data, elem, offset:
 				ffp_eval(self, plot, data, elem, offset) /
-				ffp_eval(operator, plot, data, elem, offset))
+				ffp_eval(operator, plot, data, elem, offset),
+			"({0} / {1})", [self, operator])
 	
 	def __rtruediv__(self, operator):
 		"""This method divides two operations."""
@@ -234,7 +805,8 @@ class Operator:
 		return Operator(
 			lambda plot, data, elem, offset:
 				ffp_eval(self, plot, data, elem, offset) /
-				ffp_eval(operator, plot, data, elem, offset))
+				ffp_eval(operator, plot, data, elem, offset),
+			"({0} / {1})", [self, operator])
 	
 	def __rdiv__(self, operator):
 		"""This method divides two operations."""
@@ -245,10 +817,19 @@ class Operator:
 		def _set(plot, key, value):
 			plot.store_data(key, value)
 			return value
+		operands, vector = [self, key], "plot.store_columns({1}, {0})"
+		# Accumulations Get(key) + value >> key are prefix sums over the rows
+		if self.template == "({0} + {1})":
+			for index, x in enumerate(self.operands):
+				if isinstance(x, Operator) and "state" in x.flags and x.operands[0] == key:
+					operands += [self.operands[1-index], x.operands[1]]
+					vector = "plot.accumulate_columns({1}, {2}, {3})"
+					break
 		return Operator(lambda plot, data, elem, offset: _set(
 			plot,
 			ffp_eval(key, plot, data, elem, offset),
-			ffp_eval(self, plot, data, elem, offset)))
+			ffp_eval(self, plot, data, elem, offset)),
+			"plot.store_data({1}, {0})", operands, ["store"], vector)
 
 
 
@@ -262,13 +843,32 @@ class Compose(Element):
 	def get_attributes(self):
 		return [self.left, self.right]
 	
-	def eval(self, plot, data, length, offset):
-		left = ffp_eval(self.left, plot, data, length, offset)
-		right = ffp_eval(self.right, plot, data, length, offset)
+	def eval(self, plot, data, length, offset, previous = None):
+		left = ffp_eval(self.left, plot, data, length, offset, previous and previous.left)
+		right = ffp_eval(self.right, plot, data, length, offset, previous and previous.right)
+		left.offset = offset
+		right.offset = offset
+		return Compose(left, right)
+	
+	def eval_columns(self, plot, data, offset, previous = None):
+		left = ffp_eval_columns(self.left, plot, data, offset, previous and previous.left)
+		right = ffp_eval_columns(self.right, plot, data, offset, previous and previous.right)
 		left.offset = offset
 		right.offset = offset
 		return Compose(left, right)
 	
+	def row(self, index):
+		return Compose(self.left.row(index), self.right.row(index))
+	
+	def get_domain(self):
+		return ffp_domain(self.left.get_domain(), self.right.get_domain())
+	
+	def shapes(self):
+		for shape in self.left.shapes():
+			yield shape
+		for shape in self.right.shapes():
+			yield shape
+	
 	def compute(self, plot):
 		self.left.compute(plot)
 		self.right.compute(plot)
@@ -280,34 +880,151 @@ class Compose(Element):
 
 
 class Data(Element):
-	"""This class maps the dataset with a graphical component."""
+	"""This class maps the dataset with a graphical component. With level
+	of detail, the rows drawn alike at pixel resolution are drawn once."""
 	
-	def __init__(self, operator):
+	def __init__(self, operator, lod = False):
 		self.operator = operator
+		self.lod = lod
 	
 	def get_attributes(self):
-		return [self.operator]
-	
-	def eval(self, plot, data, length, offset):
-		operators = []
-		for index in range(length):
-			operator = ffp_eval(self.operator, plot, data, index, offset)
+		return [self.operator, self.lod]
+	
+	def eval(self, plot, data, length, offset, previous = None):
+		if isinstance(data, Stream):
+			return Data(Chunks(self.operator, plot, data, offset), self.lod)
+		if isinstance(data, Columns):
+			operator = self.eval_sweeps(plot, data, length, offset,
+				previous.component if isinstance(previous, Vector) else None)
+			if operator is not None:
+				operator.offset = offset
+				return Vector(operator, length, self.lod)
+		previous = previous if isinstance(previous, Data) else None
+		operators = Rows(offset, plot.styles)
+		for index in range(plot.start, length):
+			operator = ffp_eval(self.operator, plot, data, index, offset,
+				previous and previous.operator[index - plot.start])
 			operator.offset = offset
 			operators.append(operator)
-		return Data(operators)
+		return Data(operators, self.lod)
+	
+	def eval_sweeps(self, plot, data, length, offset, previous):
+		"""This method evaluates the graphical component at once over all the
+		rows of a columnar dataset. When values of the plot data are carried
+		from row to row, the rows are swept until they do not change, and
+		None is returned if they still change or the keys are not constant."""
+		events = ffp_state(self.operator)
+		accumulators, once = ffp_accumulators(events)
+		if not accumulators:
+			return ffp_eval_columns(self.operator, plot, data, offset, previous)
+		if ("store", None) in events:
+			return None
+		plot.sweep = Sweep(plot.data, length, accumulators & once)
+		try:
+			for sweep in range(len(accumulators) + 2):
+				operator = ffp_eval_columns(self.operator, plot, data, offset, previous)
+				if plot.sweep.next():
+					return operator
+			plot.sweep.restore()
+		finally:
+			plot.sweep = None
+		return None
 	
 	def compute(self, plot):
 		for op in self.operator:
 			op.compute(plot)
 	
-	def draw(self, plot):
+	def shapes(self):
 		for op in self.operator:
-			op.draw(plot)
+			for shape in op.shapes():
+				yield shape
+	
+	def draw_rows(self, plot):
+		self.draw(plot)
+	
+	def draw(self, plot):
+		if isinstance(self.operator, Rows):
+			plot.scenes.append((plot.start, plot.viewport, self))
+			plot.index = None
+		if self.lod:
+			ffp_draw(plot, ffp_decimate(self.shapes()))
+		elif isinstance(self.operator, Chunks):
+			for chunk in self.operator.chunks():
+				Data(chunk).draw(plot)
+		else:
+			ffp_draw(plot, self.shapes())
+
+
+
+class Chunks:
+	"""This class evaluates a graphical component for the rows of a stream,
+	one chunk of rows at a time, each time it is iterated."""
+	
+	def __init__(self, component, plot, data, offset):
+		self.component = component
+		self.plot = plot
+		self.data = data
+		self.offset = offset
+	
+	def __iter__(self):
+		"""This method iterates over the evaluated graphical components."""
+		for chunk in self.chunks():
+			for element in chunk:
+				yield element
+	
+	def chunks(self):
+		"""This method iterates over the lists of graphical components
+		evaluated for each chunk of rows."""
+		for rows in self.data.chunks():
+			chunk = []
+			for index in rows:
+				element = ffp_eval(self.component, self.plot, self.data, index, self.offset)
+				element.offset = self.offset
+				chunk.append(element)
+			yield chunk
+
+
+
+class Vector(Element):
+	"""This class stores a graphical component evaluated over a whole columnar dataset."""
+	
+	def __init__(self, component, length, lod = False):
+		self.component = component
+		self.length = length
+		self.lod = lod
+	
+	def get_attributes(self):
+		return [self.component, self.length, self.lod]
+	
+	def compute(self, plot):
+		if self.length > 0:
+			self.component.compute(plot)
+	
+	def shapes(self):
+		for index in range(self.length):
+			for shape in self.component.row(index).shapes():
+				yield shape
+	
+	def draw(self, plot):
+		plot.scenes.append((0, plot.viewport, self))
+		plot.index = None
+		vector = self
+		if self.lod and self.component.batch is not None:
+			rows = ffp_decimated_rows(
+				list(self.component.get_geometry()) + list(self.component.get_style()),
+				self.length)
+			vector = Vector(self.component.row(rows), len(rows))
+		if vector.component.batch in plot.primitives:
+			vector.component.draw_columns(plot, vector.length)
+		else:
+			ffp_draw(plot, ffp_decimate(vector.shapes()) if vector.lod else vector.shapes())
 
 
 
 class Axis(Element):
-	"""This class represents the axis."""
+	"""This class represents the axis, whose domains (min, max) may be declared.
+	When cull is set, the graphical components outside the inner area of the
+	axis are not drawn."""
 	
 	# Default margins for axis
 	margin_left = 60
@@ -318,31 +1035,61 @@ class Axis(Element):
 	# Default number of ticks
 	nb_ticks = 5
 	
-	def __init__(self, component, xticks = None, yticks = None, xlabels = None, ylabels = None):
+	# Only the inner component is needed to compute dimensions
+	bounds = [0]
+	
+	def __init__(self, component, xticks = None, yticks = None, xlabels = None, ylabels = None, xdomain = None, ydomain = None, cull = False):
 		self.component = component
 		self.xticks = xticks
 		self.yticks = yticks
 		self.xlabels = xlabels
 		self.ylabels = ylabels
+		self.xdomain = xdomain
+		self.ydomain = ydomain
+		self.cull = cull
 		
 	
 	def get_attributes(self):
-		return [self.component, self.xticks, self.yticks, self.xlabels, self.ylabels]
+		return [self.component, self.xticks, self.yticks, self.xlabels, self.ylabels, self.xdomain, self.ydomain, self.cull]
 	
-	def eval(self, plot, data, elem, offset):
+	def get_domain(self):
+		left, right = (None, None) if self.xdomain is None else self.xdomain
+		bottom, top = (None, None) if self.ydomain is None else self.ydomain
+		return ffp_domain((left, right, top, bottom), self.component.get_domain())
+	
+	def eval(self, plot, data, elem, offset, previous = None):
 		left, right, top, bottom = offset
 		new_offset = (
 			left+self.margin_left, right+self.margin_right,
 			top+self.margin_top, bottom+self.margin_bottom)
-		axis = Axis(*list(map(
-			lambda x: ffp_eval(x, plot, data, elem, new_offset) if x is not None else None,
-				self.get_attributes())))
+		axis = Axis(*self.eval_attributes(plot, previous,
+			lambda x, p: ffp_eval(x, plot, data, elem, new_offset, p)))
 		axis.component.offset = new_offset
 		return axis
 	
 	def compute(self, plot):
 		self.component.compute(plot)
 	
+	def draw_inner(self, plot, draw):
+		"""This method draws the inner component, restricting the viewport
+		of the plot to the inner area of the axis when cull is set."""
+		viewport = plot.viewport
+		if self.cull:
+			left = self.margin_left + self.get_offset_left()
+			bottom = self.margin_bottom + self.get_offset_bottom()
+			right = plot.width - self.get_offset_right() - self.margin_right
+			top = plot.height - self.get_offset_top() - self.margin_top
+			plot.viewport = (
+				max(left, viewport[0]), max(bottom, viewport[1]),
+				min(right, viewport[2]), min(top, viewport[3]))
+		try:
+			draw(plot)
+		finally:
+			plot.viewport = viewport
+	
+	def draw_rows(self, plot):
+		self.draw_inner(plot, self.component.draw_rows)
+	
 	def draw(self, plot):
 		width = plot.width - self.get_offset_left() - self.get_offset_right() - self.margin_left - self.margin_right
 		height = plot.height - self.get_offset_bottom() - self.get_offset_top() - self.margin_top - self.margin_bottom
@@ -358,7 +1105,7 @@ class Axis(Element):
 			height,
 			"white", "black", 1)
 		# Draw component inside
-		self.component.draw(plot)
+		self.draw_inner(plot, self.component.draw)
 		# Draw axis
 		for i in range(len(xticks)):
 			xi = self.margin_left + self.get_offset_left() + xticks[i]
@@ -396,6 +1143,9 @@ class Axis(Element):
 class Empty(Element):	
 	"""This class does not draw nothing."""
 	
+	# Only the stored values are needed to compute dimensions
+	bounds = []
+	
 	def __init__(self, *args, **kwargs):
 		self.args = list(args)
 		self.kwargs = kwargs
@@ -408,6 +1158,12 @@ class Empty(Element):
 class Line(Element):
 	"""This class represents a line from (x,y) to (fx,fy)."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1, 2, 3]
+	
+	# Batched primitive
+	batch = "lines"
+	
 	def __init__(self, x, y, fx, fy, border_color = None, border_width = None):
 		self.x = x
 		self.y = y
@@ -422,20 +1178,37 @@ class Line(Element):
 	def compute(self, plot):
 		plot.set_max_dimensions(self.x, self.y, self.fx, self.fy)
 	
-	def draw(self, plot):
-		plot.primitives["line"](
-			plot,
+	def get_geometry(self):
+		return (
 			self.x + self.get_offset_left(),
 			self.y + self.get_offset_bottom(),
 			self.fx + self.get_offset_left(),
-			self.fy + self.get_offset_bottom(),
-			self.border_color, self.border_width)
+			self.fy + self.get_offset_bottom())
+	
+	def get_style(self):
+		return (self.border_color, self.border_width)
+	
+	def get_box(self):
+		x, y, fx, fy = self.get_geometry()
+		width = (1 if self.border_width is None else self.border_width) / 2.0
+		left, right = ffp_where(x <= fx, x, fx), ffp_where(x <= fx, fx, x)
+		bottom, top = ffp_where(y <= fy, y, fy), ffp_where(y <= fy, fy, y)
+		return (left - width, bottom - width, right + width, top + width)
+	
+	def draw(self, plot):
+		plot.primitives["line"](plot, *(self.get_geometry() + self.get_style()))
 
 
 
 class Circle(Element):
 	"""This class represents a circle with center (x,y) and radius r."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1]
+	
+	# Batched primitive
+	batch = "circles"
+	
 	def __init__(self, x, y, r, background_color = None, border_color = None, border_width = None):
 		self.x = x
 		self.y = y
@@ -452,19 +1225,33 @@ class Circle(Element):
 	def compute(self, plot):
 		plot.set_max_dimensions(self.x, self.y, self.x, self.y)
 	
-	def draw(self, plot):
-		plot.primitives["circle"](
-			plot,
+	def get_geometry(self):
+		return (
 			self.x + self.get_offset_left(),
 			self.y + self.get_offset_bottom(),
-			self.radius,
-			self.background_color, self.border_color, self.border_width)
+			self.radius)
+	
+	def get_style(self):
+		return (self.background_color, self.border_color, self.border_width)
+	
+	def get_box(self):
+		x, y, radius = self.get_geometry()
+		return (x - radius, y - radius, x + radius, y + radius)
+	
+	def draw(self, plot):
+		plot.primitives["circle"](plot, *(self.get_geometry() + self.get_style()))
 
 
 
 class Pie(Element):
 	"""This class represents a sector."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1]
+	
+	# Batched primitive
+	batch = "pies"
+	
 	def __init__(self, x, y, r, alpha, beta, background_color = None, border_color = None, border_width = None):
 		self.x = x
 		self.y = y
@@ -483,20 +1270,34 @@ class Pie(Element):
 	def compute(self, plot):
 		plot.set_max_dimensions(self.x, self.y, self.x, self.y)
 	
-	def draw(self, plot):
-		plot.primitives["pie"](
-			plot,
+	def get_geometry(self):
+		return (
 			self.x + self.get_offset_left(),
 			self.y + self.get_offset_bottom(),
 			self.radius,
-			self.alpha, self.beta,
-			self.background_color, self.border_color, self.border_width)
+			self.alpha, self.beta)
+	
+	def get_style(self):
+		return (self.background_color, self.border_color, self.border_width)
+	
+	def get_box(self):
+		x, y, radius = self.get_geometry()[:3]
+		return (x - radius, y - radius, x + radius, y + radius)
+	
+	def draw(self, plot):
+		plot.primitives["pie"](plot, *(self.get_geometry() + self.get_style()))
 
 
 
 class Arc(Element):
 	"""This class represents an arc."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1]
+	
+	# Batched primitive
+	batch = "arcs"
+	
 	def __init__(self, x, y, r, alpha, beta, background_color = None, border_color = None, border_width = None):
 		self.x = x
 		self.y = y
@@ -515,20 +1316,34 @@ class Arc(Element):
 	def compute(self, plot):
 		plot.set_max_dimensions(self.x, self.y, self.x, self.y)
 	
-	def draw(self, plot):
-		plot.primitives["arc"](
-			plot,
+	def get_geometry(self):
+		return (
 			self.x + self.get_offset_left(),
 			self.y + self.get_offset_bottom(),
 			self.radius,
-			self.alpha, self.beta,
-			self.background_color, self.border_color, self.border_width)
+			self.alpha, self.beta)
+	
+	def get_style(self):
+		return (self.background_color, self.border_color, self.border_width)
+	
+	def get_box(self):
+		x, y, radius = self.get_geometry()[:3]
+		return (x - radius, y - radius, x + radius, y + radius)
+	
+	def draw(self, plot):
+		plot.primitives["arc"](plot, *(self.get_geometry() + self.get_style()))
 
 
 
 class Rectangle(Element):
 	"""This class represents a rectangle."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1, 2, 3]
+	
+	# Batched primitive
+	batch = "rectangles"
+	
 	def __init__(self, x, y, dx, dy, background_color = None, border_color = None, border_width = None):
 		self.x = x
 		self.y = y
@@ -546,19 +1361,34 @@ class Rectangle(Element):
 	def compute(self, plot):
 		plot.set_max_dimensions(self.x, self.y, self.x + self.dx, self.y + self.dy)
 	
-	def draw(self, plot):
-		plot.primitives["rectangle"](
-			plot,
+	def get_geometry(self):
+		return (
 			self.x + self.get_offset_left(),
 			self.y + self.get_offset_bottom(),
-			self.dx, self.dy,
-			self.background_color, self.border_color, self.border_width)
+			self.dx, self.dy)
+	
+	def get_style(self):
+		return (self.background_color, self.border_color, self.border_width)
+	
+	def get_box(self):
+		x, y, dx, dy = self.get_geometry()
+		left, bottom = x + ffp_where(dx < 0, dx, 0), y + ffp_where(dy < 0, dy, 0)
+		return (left, bottom, left + abs(dx), bottom + abs(dy))
+	
+	def draw(self, plot):
+		plot.primitives["rectangle"](plot, *(self.get_geometry() + self.get_style()))
 
 
 
 class Text(Element):
 	"""This class represents a text."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1]
+	
+	# Batched primitive
+	batch = "texts"
+	
 	def __init__(self, x, y, text, font_family = None, font_size = None, font_color = None, text_align = None):
 		self.x = x
 		self.y = y
@@ -576,22 +1406,38 @@ class Text(Element):
 	def compute(self, plot):
 		plot.set_max_dimensions(self.x, self.y, self.x, self.y)
 	
-	def draw(self, plot):
-		fs = 16 if self.font_size is None else self.font_size
+	def get_geometry(self):
+		return (
+			self.x + self.get_offset_left(),
+			self.y + self.get_offset_bottom(),
+			ffp_array(list(map(str, self.text))) if ffp_is_array(self.text) else str(self.text))
+	
+	def get_style(self):
 		ff = "Helvetica" if self.font_family is None else self.font_family
+		fs = 16 if self.font_size is None else self.font_size
 		fc = "black" if self.font_color is None else self.font_color
 		ta = "center" if self.text_align is None else self.text_align
-		plot.primitives["text"](
-			plot,
-			self.x + self.get_offset_left(),
-			self.y + self.get_offset_bottom(),
-			str(self.text), ff, fs, fc, ta)
+		return (ff, fs, fc, ta)
+	
+	def get_box(self):
+		# The size of the text is estimated from the size of the font
+		x, y, text = self.get_geometry()
+		family, size, color, align = self.get_style()
+		width = 0.6 * size * ffp_lengths(text)
+		left = x - ffp_where(align == "left", 0, ffp_where(align == "right", width, width / 2.0))
+		return (left, y - size / 2.0, left + width, y + size / 2.0)
+	
+	def draw(self, plot):
+		plot.primitives["text"](plot, *(self.get_geometry() + self.get_style()))
 
 
 
 class Image(Element):
 	"""This class represents a image."""
 	
+	# Attributes needed to compute dimensions
+	bounds = [0, 1]
+	
 	def __init__(self, x, y, path):
 		self.x = x
 		self.y = y
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides the profiling of the drawing of plots."""
+
+import time
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+class Profile:
+	"""This class accumulates the number of calls and the wall time of the
+	phases of a draw ("phase"), of the evaluation of each type of graphical
+	component ("eval") and of each primitive of the interface ("primitive").
+	The times of the graphical components include the components inside.
+
+	The callback, if given, is called with the kind, the name and the time
+	in seconds of every call measured."""
+	
+	def __init__(self, callback = None):
+		self.callback = callback
+		self.stats = dict([])
+	
+	def call(self, kind, name, function, *args):
+		"""This method calls a function measuring its time."""
+		start = time.time()
+		try:
+			return function(*args)
+		finally:
+			self.record(kind, name, time.time() - start)
+	
+	def record(self, kind, name, seconds):
+		"""This method adds a call to the statistics (calls, seconds) of
+		the given kind and name."""
+		calls, total = self.stats.get((kind, name), (0, 0.0))
+		self.stats[(kind, name)] = (calls + 1, total + seconds)
+		if self.callback is not None:
+			self.callback(kind, name, seconds)
+	
+	def wrap(self, primitives):
+		"""This method returns the primitives of an interface measuring
+		the time of their calls."""
+		return dict((name, self.measure(name, primitive)) for name, primitive in primitives.items())
+	
+	def measure(self, name, primitive):
+		"""This method returns a primitive measuring the time of its calls."""
+		return lambda *args: self.call("primitive", name, primitive, *args)
+	
+	def clear(self):
+		"""This method drops the statistics."""
+		self.stats.clear()
+	
+	def report(self):
+		"""This method returns the statistics as a table, sorted by kind
+		and by time."""
+		lines = ["%-10s %-16s %10s %12s" % ("kind", "name", "calls", "ms")]
+		for (kind, name), (calls, seconds) in sorted(self.stats.items(), key = lambda x: (x[0][0], -x[1][1])):
+			lines.append("%-10s %-16s %10d %12.3f" % (kind, name, calls, 1000 * seconds))
+		return "\n".join(lines)
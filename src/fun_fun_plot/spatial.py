@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This module provides a spatial index of the drawn graphical components."""
+
+from array import array
+from math import floor
+
+__author__ = "José Antonio Riaza Valverde"
+__copyright__ = "Copyright 2018, José Antonio Riaza Valverde"
+__credits__ = ["José Antonio Riaza Valverde"]
+__license__ = "BSD 3-Clause License"
+__maintainer__ = "José Antonio Riaza Valverde"
+__email__ = "riazavalverde@gmail.com"
+__status__ = "Development"
+
+
+
+class Grid:
+	"""This class indexes boxes (left, bottom, right, top) inside a canvas in
+	a uniform grid of square cells, so the boxes containing a point are
+	found among the few ones overlapping its cell."""
+	
+	def __init__(self, width, height, cell = 16):
+		self.width = width
+		self.height = height
+		self.cell = float(cell)
+		self.cells = dict([])
+		self.boxes = array("d")
+		self.values = []
+	
+	def __len__(self):
+		"""This method returns the number of boxes."""
+		return len(self.values)
+	
+	def insert(self, box, value, viewport = None):
+		"""This method adds a box with its value, clipped to the canvas and to
+		the viewport (left, bottom, right, top) if any. The boxes outside
+		them are ignored."""
+		left, bottom, right, top = map(float, box)
+		vleft, vbottom, vright, vtop = (0, 0, self.width, self.height) if viewport is None else viewport
+		left, bottom = max(left, 0.0, float(vleft)), max(bottom, 0.0, float(vbottom))
+		right = min(right, float(self.width), float(vright))
+		top = min(top, float(self.height), float(vtop))
+		if not (left <= right and bottom <= top):
+			return
+		entry = len(self.values)
+		self.boxes.extend((left, bottom, right, top))
+		self.values.append(value)
+		for i in range(int(floor(left / self.cell)), int(floor(right / self.cell)) + 1):
+			for j in range(int(floor(bottom / self.cell)), int(floor(top / self.cell)) + 1):
+				self.cells.setdefault((i, j), array("l")).append(entry)
+	
+	def query(self, x, y):
+		"""This method returns the values of the boxes containing the point,
+		in the order they were added."""
+		cell = (int(floor(x / self.cell)), int(floor(y / self.cell)))
+		values = []
+		for entry in self.cells.get(cell, ()):
+			left, bottom, right, top = self.boxes[entry*4:entry*4+4]
+			if left <= x <= right and bottom <= y <= top:
+				values.append(self.values[entry])
+		return values
@@ -0,0 +1,64 @@
+import sys
+import os
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fun_fun_plot.primitives import *
+from fun_fun_plot.operators import *
+from fun_fun_plot.datasets import Columns
+from fun_fun_plot.interfaces.recording import *
+
+
+
+def xs(x, data):
+	"""This function returns the abscissas of the circles drawn at x."""
+	plot = Plot(Data(Circle(x, Attr(1), 1)), ffp_recording, width = 100, height = 100,
+		domain = (0, 100, 100, 0)).draw(data)
+	values = []
+	for name, args in plot.canvas:
+		if name == "circles":
+			values.extend(args[0])
+		elif name == "circle":
+			values.append(args[0])
+	return values
+
+
+
+class TestCall(unittest.TestCase):
+	"""The functions called over a columnar dataset return the same values
+	as when they are called row by row."""
+	
+	def assertSame(self, x, rows):
+		self.assertEqual(xs(x, Columns(list(zip(*rows)))), xs(x, rows))
+	
+	def test_sequences(self):
+		rows = [[[1, 5, 3], 1], [[2, .5, 9], 2], [[4, 4, 1], 3]]
+		self.assertEqual(xs(Call(max)(Attr(0)), rows), [5, 9, 4])
+		self.assertSame(Call(max)(Attr(0)), rows)
+		self.assertSame(Call(min)(Attr(0)), rows)
+		self.assertSame(Call(sum)(Attr(0)), rows)
+	
+	def test_strings(self):
+		rows = [["abc", 1], ["cde", 2], ["fab", 3]]
+		self.assertSame(Call(len)(Attr(0)) + Call(ord)(Call(max)(Attr(0))), rows)
+	
+	def test_columns(self):
+		rows = [[1.0, 1], [2.0, 2], [4.0, 3]]
+		self.assertSame(Call(max)(Column(0)) + Call(sum)(Column(0)) + Attr(0), rows)
+		self.assertSame(Normal(Attr(0), Column(0)) * 10, rows)
+	
+	def test_arguments(self):
+		rows = [[1.0, 7.0], [2.0, 0.5], [4.0, 4.0]]
+		self.assertSame(Call(max)(Attr(0), Attr(1)), rows)
+		self.assertSame(Call(min)(Attr(0), Attr(1), 3), rows)
+		self.assertSame(Call(float)(Call(str)(Attr(0))), rows)
+	
+	def test_round(self):
+		rows = [[0.5, 1], [2.5, 2], [-1.5, 3], [1.4, 4]]
+		self.assertEqual(xs(Call(round)(Attr(0)) + 10, rows), [11.0, 13.0, 8.0, 11.0])
+		self.assertSame(Call(round)(Attr(0)) + 10, rows)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,118 @@
+import sys
+import os
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fun_fun_plot.primitives import *
+from fun_fun_plot.operators import *
+from fun_fun_plot.interfaces.null import *
+from fun_fun_plot import operators
+
+
+
+class Counter:
+	"""This class counts the evaluations of an operator in each pass of
+	Plot.draw: before (0) and after (1) computing the dimensions."""
+	
+	def __init__(self):
+		self.passes = [0, 0]
+	
+	def __call__(self, plot, value):
+		self.passes[int(plot.computed)] += 1
+		return value
+
+
+
+def counted(counter, operator):
+	"""This function returns an operator counting the evaluations of another
+	one, keeping its flags so the plan of the draw does not change."""
+	return Operator(lambda plot, data, elem, offset: counter(plot, ffp_eval(operator, plot, data, elem, offset)),
+		"{0}(plot, {1})", [counter, operator])
+
+def scatter(attr):
+	return Plot(
+		Axis(
+			Data(
+				Circle(
+					Xnormal(attr(0)),
+					Ynormal(attr(1)),
+					4,
+					background_color = ClassColor(attr(2))
+				)
+			)
+		),
+		ffp_null, width = 400, height = 400
+	)
+
+def radial_bar(attr, width):
+	return Plot(
+		Rectangle(0, 0, width, Height, background_color = "white", border_width = 0) +
+		Data(
+			Pie(
+				width / 2,
+				Height / 2,
+				width / 2 / (DataLen + 2) * (DataLen - Index + 1) >> "height",
+				90,
+				-270,
+				background_color = "white"
+			) +
+			Pie(
+				width / 2,
+				Height / 2,
+				Get("height"),
+				90,
+				Normal(attr(0), Column(0)) * (-180) - 90,
+				background_color = ClassColor(attr(2))
+			) +
+			Text(
+				width / 2,
+				Height / 2 + Get("height") - 10,
+				attr(1) + " ",
+				text_align = "right",
+				font_size = 12
+			)
+		) +
+		Circle(
+			width / 2,
+			Height / 2,
+			width / 2 / (DataLen + 2),
+			background_color = "white",
+			border_width = 0
+		),
+		ffp_null, width = 400, height = 400
+	)
+
+
+
+class TestPasses(unittest.TestCase):
+	"""The first pass of Plot.draw only evaluates the attributes needed to
+	compute the dimensions, and the second one reuses the attributes that
+	do not depend on them."""
+	
+	def test_scatter(self):
+		counter = Counter()
+		plot = scatter(lambda n: counted(counter, operators.Attr(n)))
+		plot.draw(list(map(lambda i: [i % 7, i % 5, "abc"[i % 3]], range(150))))
+		# The x and y attributes are evaluated in both passes since they
+		# are normalized to the dimensions, the class only in the second
+		# one: 750 evaluations instead of 900
+		self.assertEqual(counter.passes, [300, 450])
+	
+	def test_radial_bar(self):
+		attrs, widths = Counter(), Counter()
+		plot = radial_bar(lambda n: counted(attrs, operators.Attr(n)), counted(widths, operators.Width))
+		plot.draw(list(map(lambda i: [i + 1.0, "label", "class"], range(9))))
+		# The dimensions are computed from the rectangle of the background,
+		# so the rows are only evaluated when drawing: 27 evaluations of
+		# the attributes instead of 54
+		self.assertEqual(attrs.passes, [0, 27])
+		# The attributes reading the width depend on the dimensions, so
+		# they are evaluated in both passes, except the radius of the inner
+		# circle, only needed to draw it. The radius of the bars is memoized
+		# once per pass since it does not read the row
+		self.assertEqual(widths.passes, [1 + 9 * 3 + 1 + 1, 1 + 9 * 3 + 1 + 2])
+
+
+
+if __name__ == "__main__":
+	unittest.main()